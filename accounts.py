@@ -0,0 +1,222 @@
+"""
+Sign-in, registration and profiles.
+"""
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required, login_user, logout_user
+
+import geo
+import rollups
+from auth import authenticate, principals
+from images import images
+from listings import workers_changed
+from models import db, Rating, User
+from skills import sync_user_skills
+from utils import queue_notifications, record_rating
+
+accounts = Blueprint("accounts", __name__)
+
+
+def dashboard_url(user):
+    if user.role == "client":
+        return url_for('clients.dashboard')
+    elif user.role == "worker":
+        return url_for('workers.find_jobs')
+    return url_for('admin.dashboard')
+
+
+# ----------- AUTH -----------
+@accounts.route('/')
+def index():
+    # wtforms is only imported by the pages that render a form
+    from forms import LoginForm
+    form = LoginForm()
+    return render_template('index.html', form=form)
+
+
+@accounts.route('/login', methods=['GET', 'POST'])
+def login():
+    # If already logged in → go to correct dashboard
+    if current_user.is_authenticated:
+        return redirect(dashboard_url(current_user))
+
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+
+        user = authenticate(email, password)
+
+        if user:
+            login_user(user)
+
+            # ✅ Redirect according to role
+            return redirect(dashboard_url(user))
+
+        else:
+            flash("Invalid Email or Password", "danger")
+            return redirect(url_for('accounts.login'))
+
+    return render_template("login.html")
+
+@accounts.route("/register", methods=["GET", "POST"])
+def register():
+    from forms import RegisterForm
+    form = RegisterForm()
+
+    if form.validate_on_submit():
+        # Check if email already exists
+        existing_user = User.query.filter_by(email=form.email.data).first()
+        if existing_user:
+            flash("⚠️ Email already exists. Try another one.", "warning")
+            return redirect(url_for("accounts.register"))
+
+        role = form.role.data
+        govt_id_image_file = form.govt_id_image.data
+
+        filename = None
+        if govt_id_image_file:
+            # content-hash name; thumbnails are made in the background
+            filename = images.save(govt_id_image_file, current_app.config['UPLOAD_FOLDER'])
+
+        # Create user object
+        user = User(
+            name=form.name.data,
+            email=form.email.data,
+            aadhar=form.aadhar.data,
+            role=role,
+            skills=form.skills.data if role == "worker" else None,
+            location=form.location.data.strip() or None,
+            govt_id_image=filename,
+            is_approved=False,  # Admin must approve
+            profile_image="default.png"
+        )
+
+        geo.locate(user)
+
+        # Hash password
+        user.set_password(form.password.data)
+
+        db.session.add(user)
+        db.session.flush()
+        sync_user_skills(user)
+        rollups.incr(rollups.SIGNUPS, key=role)
+        db.session.commit()
+
+        flash("✅ Account created successfully! Wait for admin approval.", "success")
+        return redirect(url_for("accounts.login"))
+
+    return render_template("register.html", form=form)
+
+@accounts.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('accounts.index'))
+
+
+# ----------- PROFILE UPDATE -----------
+@accounts.route('/update_profile', methods=['POST'])
+@login_required
+def update_profile():
+    current_user.name = request.form.get("name")
+    current_user.bio = request.form.get("bio")
+    if "location" in request.form:
+        current_user.location = request.form["location"].strip() or None
+        geo.locate(current_user)
+
+    if current_user.role == "worker":
+        current_user.skills = request.form.get("skills")
+        sync_user_skills(current_user)
+
+    # Handle Profile Image Upload
+    file = request.files.get("profile_image")
+    if file and file.filename != "":
+        current_user.profile_image = images.save(file, current_app.config['IMAGE_UPLOADS_FOLDER'])
+
+    db.session.commit()
+    principals.invalidate(current_user.id)
+    workers_changed(current_user.id)
+    flash("Profile Updated Successfully!")
+    return redirect(url_for('accounts.profile_view', user_id=current_user.id))
+
+@accounts.route('/profile/<int:user_id>')
+@login_required
+def profile_view(user_id):
+    user = User.query.get_or_404(user_id)
+    # get reviews / ratings
+    reviews = Rating.query.filter_by(recipient_id=user_id).order_by(Rating.created_at.desc()).all()
+
+    # If current user has already rated this user for a job, you might want to prevent duplicate — optional
+    existing_rating = None
+    if current_user.is_authenticated:
+        existing_rating = Rating.query.filter_by(recipient_id=user_id, author_id=current_user.id).first()
+
+    return render_template('profile_view.html', user=user, reviews=reviews, existing_rating=existing_rating)
+
+
+@accounts.route('/edit_profile', methods=['GET', 'POST'])
+@login_required
+def edit_profile():
+    if request.method == "POST":
+        current_user.name = request.form['name']
+        current_user.skills = request.form.get('skills')
+        current_user.bio = request.form.get('bio')
+        current_user.location = request.form.get('location', '').strip() or None
+        geo.locate(current_user)
+        sync_user_skills(current_user)
+
+        # ✅ PROFILE IMAGE UPLOAD
+        if 'profile_image' in request.files:
+            pfile = request.files['profile_image']
+            if pfile and pfile.filename != "":
+                current_user.profile_image = images.save(pfile, current_app.config['PROFILE_PIC_FOLDER'])
+
+        # ✅ GOVT ID UPLOAD
+        if 'govt_id_image' in request.files:
+            gfile = request.files['govt_id_image']
+            if gfile and gfile.filename != "":
+                current_user.govt_id_image = images.save(gfile, current_app.config['UPLOAD_FOLDER'])
+
+        db.session.commit()
+        principals.invalidate(current_user.id)
+        workers_changed(current_user.id)
+        return redirect(url_for('accounts.profile_view', user_id=current_user.id))
+
+    return render_template("edit_profile.html")
+
+# ----------- RATING SYSTEM -----------
+@accounts.route('/rate_user/<int:user_id>', methods=['POST'])
+@login_required
+def rate_user(user_id):
+    recipient = User.query.get_or_404(user_id)
+
+    # who is rating
+    author = current_user
+
+    # parse form
+    try:
+        score = int(request.form.get('rating', 0))
+    except (TypeError, ValueError):
+        score = 0
+
+    comment = request.form.get('review', '').strip()
+    job_id = request.form.get('job_id') or None
+    if job_id:
+        try:
+            job_id = int(job_id)
+        except ValueError:
+            job_id = None
+
+    if score < 1 or score > 5:
+        flash("Please select a rating between 1 and 5.", "warning")
+        return redirect(url_for('accounts.profile_view', user_id=user_id))
+
+    # one rating per author per job; a repeat updates it and adjusts the aggregates
+    record_rating(user_id, author.id, job_id, score, comment)
+
+    # notify the recipient; aggregates and the notification are written by
+    # tasks queued in this same commit
+    queue_notifications([user_id], f"You received a {score}-star rating from {author.name}")
+
+    db.session.commit()
+    flash("Rating submitted. Thank you!", "success")
+    return redirect(url_for('accounts.profile_view', user_id=user_id))
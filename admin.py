@@ -0,0 +1,215 @@
+"""
+Admin pages: dashboard, performance, user management and moderation.
+"""
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, flash, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+
+import rollups
+from auth import principals
+from fanout import fanout
+from listings import workers_changed
+from models import db, User, UserSkill
+from pagination import keyset_page, page_args, page_json, wants_json
+from perf import profiler, SAMPLE_SIZE
+from retention import retention
+from serializers import user_json
+from tasks import tasks
+from utils import moderate_users
+
+admin = Blueprint("admin", __name__)
+
+
+@admin.route('/approve_worker/<int:worker_id>')
+@login_required
+def approve_worker(worker_id):
+    if current_user.role != 'admin':
+        return redirect('/')
+
+    worker = User.query.get(worker_id)
+    worker.is_approved = True
+    worker.reviewed_at = datetime.utcnow()
+    db.session.commit()
+    principals.invalidate(worker.id)
+    workers_changed(worker.id)
+
+    return redirect(url_for('admin.dashboard'))
+
+
+@admin.route('/reject_worker/<int:worker_id>')
+@login_required
+def reject_worker(worker_id):
+    if current_user.role != 'admin':
+        return redirect('/')
+
+    worker = User.query.get(worker_id)
+    worker.is_approved = False
+    worker.reviewed_at = datetime.utcnow()
+    db.session.commit()
+    principals.invalidate(worker.id)
+    workers_changed(worker.id)
+
+    return redirect(url_for('admin.dashboard'))
+
+
+# -------------------- ADMIN DASHBOARD --------------------
+@admin.route('/admin/dashboard')
+@login_required
+def dashboard():
+    if current_user.role != "admin":
+        return redirect('/')   # prevent client/worker accessing admin panel
+
+    cursor, limit = page_args()
+    page = keyset_page(User.query, User.id, cursor, limit, descending=False)
+    if wants_json():
+        return jsonify(page_json(page, user_json))
+    # charts read only the daily rollups, never the raw tables
+    days = max(7, min(request.args.get('days', rollups.DEFAULT_DAYS, type=int), 365))
+    return render_template('admin_dashboard.html', users=page.items, next_cursor=page.next_cursor,
+                           stats=rollups.summary(days))
+
+
+# -------------------- ADMIN PERFORMANCE --------------------
+@admin.route('/admin/perf')
+@login_required
+def perf():
+    if current_user.role != "admin":
+        return redirect('/')
+    return render_template('admin_perf.html', rows=profiler.summary(), enabled=profiler.enabled,
+                           sample_size=SAMPLE_SIZE)
+
+
+@admin.route('/metrics')
+def metrics():
+    # scrapers authenticate with PERF_METRICS_TOKEN; admins can just look
+    token = current_app.config['PERF_METRICS_TOKEN']
+    scraper = token and request.headers.get("Authorization") == f"Bearer {token}"
+    if not scraper and not (current_user.is_authenticated and current_user.role == "admin"):
+        return Response("forbidden\n", status=403, mimetype="text/plain")
+    return Response(profiler.prometheus() + retention.prometheus() + fanout.prometheus(),
+                    mimetype="text/plain; version=0.0.4")
+
+
+# -------------------- ADMIN MANAGE USERS PAGE --------------------
+@admin.route('/admin/users')
+@login_required
+def users():
+    if current_user.role != "admin":
+        return redirect('/')
+
+    cursor, limit = page_args()
+    page = keyset_page(User.query, User.id, cursor, limit, descending=False)
+    if wants_json():
+        return jsonify(page_json(page, user_json))
+    return render_template('admin_users.html', users=page.items, next_cursor=page.next_cursor)
+
+
+# -------------------- DELETE USER --------------------
+@admin.route('/admin/delete_user/<int:user_id>')
+@login_required
+def delete_user(user_id):
+    if current_user.role != "admin":
+        return redirect('/')
+
+    user = User.query.get(user_id)
+
+    if user:
+        UserSkill.query.filter_by(user_id=user.id).delete()
+        db.session.delete(user)
+        db.session.commit()
+        principals.invalidate(user_id)
+        workers_changed(user_id)
+
+    return redirect(url_for('admin.users'))
+
+
+# -------------------- APPROVE USER --------------------
+@admin.route('/admin/approve/<int:user_id>')
+@login_required
+def approve_user(user_id):
+    if current_user.role != "admin":
+        return redirect('/')
+
+    user = User.query.get(user_id)
+
+    if user:
+        user.is_approved = True
+        user.reviewed_at = datetime.utcnow()
+        db.session.commit()
+        principals.invalidate(user.id)
+        workers_changed(user.id)
+
+    return redirect(url_for('admin.users'))
+
+
+# -------------------- REJECT USER --------------------
+@admin.route('/admin/reject/<int:user_id>')
+@login_required
+def reject_user(user_id):
+    if current_user.role != "admin":
+        return redirect('/')
+
+    user = User.query.get(user_id)
+
+    if user:
+        user.is_approved = False
+        user.reviewed_at = datetime.utcnow()
+        db.session.commit()
+        principals.invalidate(user.id)
+        workers_changed(user.id)
+
+    return redirect(url_for('admin.users'))
+
+
+# -------------------- MODERATION QUEUE --------------------
+def pending_users():
+    return User.query.filter(User.reviewed_at.is_(None), User.role != 'admin')
+
+
+@admin.route('/admin/moderation')
+@login_required
+def moderation():
+    """Accounts awaiting review, oldest first."""
+    if current_user.role != "admin":
+        return redirect('/')
+
+    cursor, limit = page_args()
+    page = keyset_page(pending_users(), User.id, cursor, limit, descending=False)
+    if wants_json():
+        return jsonify(page_json(page, user_json))
+    return render_template('admin_moderation.html', users=page.items, next_cursor=page.next_cursor,
+                           pending=pending_users().count())
+
+
+@admin.route('/admin/moderation', methods=['POST'])
+@login_required
+def moderate():
+    """
+    Approve or reject every selected account with one UPDATE and one
+    notification task, instead of a request and a commit per user.
+    """
+    if current_user.role != "admin":
+        return redirect('/')
+
+    action = request.form.get('action')
+    if action not in ('approve', 'reject'):
+        flash("Choose approve or reject.", "error")
+        return redirect(url_for('admin.moderation'))
+    user_ids = request.form.getlist('user_ids', type=int)
+
+    changed = moderate_users(user_ids, approve=action == 'approve')
+    workers = [user_id for user_id, role in changed if role == 'worker']
+    if workers and action == 'approve':
+        tasks.enqueue("recommend.workers", worker_ids=workers)
+    db.session.commit()
+
+    for user_id, _ in changed:
+        principals.invalidate(user_id)
+    if workers and action == 'approve':
+        workers_changed()
+
+    if wants_json():
+        return jsonify({"ok": True, "action": action, "user_ids": [user_id for user_id, _ in changed]})
+    flash(f"{'Approved' if action == 'approve' else 'Rejected'} {len(changed)} account(s).", "success")
+    return redirect(url_for('admin.moderation'))
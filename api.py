@@ -0,0 +1,250 @@
+"""
+Versioned JSON API for the mobile client: /api/v1/...
+
+Every endpoint answers conditional GETs. The ETag (and, for jobs and
+applications, Last-Modified) comes from one aggregate query over the rows
+the endpoint can return (newest id, newest change, unread count), so an
+unchanged poll costs that query and a 304 with no body.
+
+Lists page newest first with ?cursor=&limit=. Pollers pass ?since=<id>
+(rows added after that id) or ?since=<ISO timestamp> (rows added or
+changed after it) and get those rows oldest first, plus the `since` to send
+next time, so each poll transfers only what is new. A timestamp `since`
+comes back as "<ISO timestamp>,<id>": the last row's stamp and id, so rows
+sharing that stamp are not skipped when a page ends among them.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Blueprint, abort, g, jsonify, make_response, request
+from flask_login import current_user
+from sqlalchemy import and_, case, func, or_
+
+import geo
+from models import db, Application, Job, Message, Notification
+from pagination import keyset_page, page_args, page_json
+from search import search_jobs
+from serializers import application_json, job_json, message_json, notification_json
+from utils import thread_query
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+# ----------- HELPERS -----------
+
+def api_login_required(view):
+    """login_required that answers 401 JSON instead of redirecting to the login page."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({"error": "authentication required"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def json_error(error):
+    return jsonify({"error": error.description}), error.code
+
+
+def parse_since():
+    """
+    ?since= as ("id", int) or ("ts", (naive UTC datetime, id or None)), or
+    None when absent. The id follows the timestamp after a comma.
+    """
+    value = request.args.get("since", "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return "id", int(value)
+    value, comma, after_id = value.partition(",")
+    if comma and not after_id.isdigit():
+        abort(400, "since must be an id, an ISO 8601 timestamp, or a timestamp and id")
+    try:
+        stamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        abort(400, "since must be an id, an ISO 8601 timestamp, or a timestamp and id")
+    if stamp.tzinfo is not None:
+        stamp = stamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return "ts", (stamp, int(after_id) if comma else None)
+
+
+def not_modified(*validator, last_modified=None):
+    """
+    Compute this request's validators from `validator` (values that change
+    whenever the response would). Returns a 304 response when the client's
+    copy is current, else None; the body then goes through conditional().
+    """
+    g.api_etag = hashlib.sha1(repr((request.full_path, current_user.id, validator)).encode()).hexdigest()[:24]
+    g.api_last_modified = last_modified
+
+    if request.if_none_match:
+        fresh = g.api_etag in request.if_none_match
+    elif request.if_modified_since and last_modified:
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        fresh = False
+    return conditional(("", 304)) if fresh else None
+
+
+def conditional(body):
+    response = make_response(body)
+    response.set_etag(g.api_etag)
+    if g.api_last_modified:
+        response.last_modified = g.api_last_modified.replace(tzinfo=timezone.utc)
+    # clients may keep a copy but must revalidate before using it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def delta(query, id_column, stamp_column, since, serialize):
+    """Rows after `since`, oldest first, and the `since` to poll with next."""
+    _, limit = page_args()
+    kind, value = since
+    if kind == "id":
+        query = query.filter(id_column > value).order_by(None).order_by(id_column)
+    else:
+        # seek on (stamp, id): a page may end part way through rows sharing a stamp
+        stamp, after_id = value
+        after = stamp_column > stamp
+        if after_id is not None:
+            after = or_(after, and_(stamp_column == stamp, id_column > after_id))
+        query = query.filter(after).order_by(None).order_by(stamp_column, id_column)
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+    if kind == "id":
+        if items:
+            value = getattr(items[-1], id_column.key)
+    else:
+        if items:
+            value = getattr(items[-1], stamp_column.key), getattr(items[-1], id_column.key)
+        stamp, after_id = value
+        value = stamp.isoformat() if after_id is None else f"{stamp.isoformat()},{after_id}"
+    return {"items": [serialize(row) for row in items], "since": value, "has_more": len(rows) > limit}
+
+
+def listing(query, id_column, stamp_column, since, serialize, newest_id):
+    """A delta when ?since= is given, else a page newest first."""
+    if since is not None:
+        return delta(query, id_column, stamp_column, since, serialize)
+    cursor, limit = page_args()
+    body = page_json(keyset_page(query, id_column, cursor, limit), serialize)
+    # where to start polling from after this listing
+    body["since"] = newest_id or 0
+    return body
+
+
+# ----------- JOBS -----------
+
+@api.route("/jobs")
+@api_login_required
+def jobs():
+    """
+    Open jobs, filtered like /find_jobs (?search=, ?location=, ?radius=).
+    With ?since=<timestamp>, jobs closed since then are included too
+    (is_open false), so a poller learns which ones to drop.
+    """
+    since = parse_since()
+    newest_id, changed = db.session.query(func.max(Job.id), func.max(Job.updated_at)).one()
+    response = not_modified(newest_id, changed, last_modified=changed)
+    if response is not None:
+        return response
+
+    search = request.args.get("search", "").strip()
+    location = request.args.get("location", "").strip()
+    open_only = not (since and since[0] == "ts")
+    place = geo.geocode(location) if location else None
+    if place:
+        query = search_jobs(search, near=(place[1:], geo.radius_arg(request.args)), open_only=open_only)
+    else:
+        query = search_jobs(search, location, open_only=open_only)
+    return conditional(jsonify(listing(query, Job.id, Job.updated_at, since, job_json, newest_id)))
+
+
+@api.route("/jobs/<int:job_id>")
+@api_login_required
+def job(job_id):
+    row = db.session.get(Job, job_id)
+    if row is None:
+        abort(404, "no such job")
+    response = not_modified(row.id, row.updated_at, last_modified=row.updated_at)
+    if response is not None:
+        return response
+    return conditional(jsonify(job_json(row)))
+
+
+# ----------- APPLICATIONS -----------
+
+@api.route("/applications")
+@api_login_required
+def applications():
+    """A worker's own applications, or the applications to a client's jobs."""
+    mine = Application.worker_id if current_user.role == "worker" else Application.client_id
+    query = Application.query.filter(mine == current_user.id)
+
+    since = parse_since()
+    newest_id, changed = db.session.query(func.max(Application.id), func.max(Application.updated_at)) \
+        .filter(mine == current_user.id).one()
+    response = not_modified(newest_id, changed, last_modified=changed)
+    if response is not None:
+        return response
+    return conditional(jsonify(
+        listing(query, Application.id, Application.updated_at, since, application_json, newest_id)
+    ))
+
+
+# ----------- NOTIFICATIONS -----------
+
+@api.route("/notifications")
+@api_login_required
+def notifications():
+    """The user's notifications; ?since= returns only new ones."""
+    query = Notification.query.filter(Notification.user_id == current_user.id)
+
+    since = parse_since()
+    newest_id, total, unread = db.session.query(
+        func.max(Notification.id), func.count(Notification.id),
+        func.count(case((Notification.is_read == db.false(), 1))),
+    ).filter(Notification.user_id == current_user.id).one()
+    # no Last-Modified: marking rows read changes the response but no timestamp
+    response = not_modified(newest_id, total, unread)
+    if response is not None:
+        return response
+
+    body = listing(query, Notification.id, Notification.timestamp, since, notification_json, newest_id)
+    body["unread"] = unread
+    return conditional(jsonify(body))
+
+
+# ----------- MESSAGES -----------
+
+@api.route("/messages")
+@api_login_required
+def messages():
+    """
+    Messages sent or received by the user, or only those exchanged with
+    ?with=<user id>; ?since= returns only new ones.
+    """
+    other = request.args.get("with", type=int)
+    if other is not None:
+        query = thread_query(current_user.id, other)
+    else:
+        query = Message.query.filter(or_(Message.sender_id == current_user.id,
+                                         Message.receiver_id == current_user.id))
+
+    since = parse_since()
+    unread_to_me = (Message.receiver_id == current_user.id) & (Message.is_read == db.false())
+    newest_id, total, unread = query.with_entities(
+        func.max(Message.id), func.count(Message.id), func.count(case((unread_to_me, 1))),
+    ).one()
+    # no Last-Modified: marking rows read changes the response but no timestamp
+    response = not_modified(newest_id, total, unread)
+    if response is not None:
+        return response
+
+    body = listing(query, Message.id, Message.timestamp, since, message_json, newest_id)
+    body["unread"] = unread
+    return conditional(jsonify(body))
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+
+from flask import request
+from werkzeug.security import safe_join
+
+FINGERPRINT_ARG = "v"
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+CHUNK_SIZE = 1024 * 1024
+UPLOAD_FOLDERS = ("UPLOAD_FOLDER", "PROFILE_PIC_FOLDER", "IMAGE_UPLOADS_FOLDER")
+
+
+class AssetFingerprints:
+    """
+    Content hashes of files under static/, appended to every
+    url_for('static', ...) as ?v=<hash>. A versioned URL never changes
+    content, so it is served as immutable; editing the file changes the URL.
+    User uploads are left alone: they are stored under content-hash names
+    already, and hashing ID scans on every page render costs real reads.
+
+    Hashes are cached per (mtime, size), so each file is read once per
+    process and a stat() per url_for picks up edits and new uploads.
+    """
+
+    def __init__(self, app=None):
+        self.static_folder = None
+        self.skip_prefixes = ()
+        self._lock = threading.Lock()
+        self._cache = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("STATIC_FINGERPRINTS", True)
+        self.static_folder = app.static_folder
+        # upload folders inside static/, as url_for filename prefixes
+        skip = []
+        for key in UPLOAD_FOLDERS:
+            folder = os.path.relpath(os.path.join(app.root_path, app.config[key]), self.static_folder)
+            if not folder.startswith(os.pardir):
+                skip.append(folder.replace(os.sep, "/").rstrip("/") + "/")
+        self.skip_prefixes = tuple(skip)
+        app.extensions["asset_fingerprints"] = self
+
+        if app.config["STATIC_FINGERPRINTS"]:
+            app.url_defaults(self._add_fingerprint)
+            app.after_request(self._cache_headers)
+
+    def fingerprint(self, filename):
+        """Short content hash of static/<filename>, or None if it's missing."""
+        path = safe_join(self.static_folder, filename)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            hit = self._cache.get(filename)
+        if hit and hit[0] == key:
+            return hit[1]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()[:12]
+        with self._lock:
+            self._cache[filename] = (key, value)
+        return value
+
+    def _add_fingerprint(self, endpoint, values):
+        if endpoint != "static" or FINGERPRINT_ARG in values:
+            return
+        if values.get("filename", "").startswith(self.skip_prefixes):
+            return
+        version = self.fingerprint(values.get("filename", ""))
+        if version:
+            values[FINGERPRINT_ARG] = version
+
+    def _cache_headers(self, response):
+        if request.endpoint != "static" or response.status_code not in (200, 206, 304):
+            return response
+        # send_file answers Range requests already; say so up front so video
+        # players seek with partial requests instead of downloading it all
+        response.accept_ranges = "bytes"
+        version = request.args.get(FINGERPRINT_ARG)
+        if version and version == self.fingerprint(request.view_args["filename"]):
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+
+assets = AssetFingerprints()
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from flask_login import LoginManager, UserMixin
+
+from models import db, User
+from passwords import needs_rehash, verify_password
+
+DEFAULT_TTL = 60
+PRINCIPAL_FIELDS = ("id", "role", "is_approved", "name")
+
+
+class Principal(UserMixin):
+    """
+    The logged-in user as most requests need it: id, role, is_approved and
+    name, from the principal cache. Anything else (bio, skills, ...) loads
+    the full User row on first use and is read from / written to it, so
+    view code can keep treating current_user as a User.
+    """
+
+    def __init__(self, id, role, is_approved, name):
+        object.__setattr__(self, "_fields", {"id": id, "role": role, "is_approved": is_approved, "name": name})
+        object.__setattr__(self, "_user", None)
+
+    @property
+    def user(self):
+        """The full User row, loaded once per request."""
+        if self._user is None:
+            object.__setattr__(self, "_user", db.session.get(User, self._fields["id"]))
+        return self._user
+
+    def __getattr__(self, name):
+        fields = object.__getattribute__(self, "_fields")
+        if name in fields:
+            return fields[name]
+        return getattr(self.user, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.user, name, value)
+        if name in self._fields:
+            self._fields[name] = value
+
+    def __repr__(self):
+        return f"<Principal {self._fields['id']} {self._fields['role']}>"
+
+
+class PrincipalCache:
+    """
+    Short-TTL per-process cache of principals, so an authenticated request
+    costs no query at all until it touches more than the cached fields.
+
+    Call invalidate() after changing a user's name, role or approval; other
+    worker processes pick the change up when their entry expires.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = DEFAULT_TTL
+        self._lock = threading.Lock()
+        self._cache = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("AUTH_PRINCIPAL_TTL", DEFAULT_TTL)
+        self.ttl = app.config["AUTH_PRINCIPAL_TTL"]
+        app.extensions["principal_cache"] = self
+
+    def load(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(user_id)
+        if hit and hit[1] > now:
+            return Principal(*hit[0])
+
+        row = db.session.query(User.id, User.role, User.is_approved, User.name).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        with self._lock:
+            self._cache[user_id] = (tuple(row), now + self.ttl)
+        return Principal(*row)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def authenticate(email, password):
+    """
+    The user for these credentials, or None. A hash made with other than
+    the configured PASSWORD_HASH_METHOD is replaced while the plaintext is
+    at hand, so changing the setting migrates users as they log in.
+    """
+    user = User.query.filter_by(email=email).first()
+    if user is None or not verify_password(user.password, password):
+        return None
+    if needs_rehash(user.password):
+        user.set_password(password)
+        db.session.commit()
+    return user
+
+
+principals = PrincipalCache()
+
+login_manager = LoginManager()
+login_manager.login_view = "accounts.index"
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    # id/role/is_approved/name from the principal cache; the full row loads on demand
+    return principals.load(int(user_id))
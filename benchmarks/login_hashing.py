@@ -0,0 +1,88 @@
+"""
+Login cost per CPU core for candidate PASSWORD_HASH_METHOD settings.
+
+For each method this times password verification alone and a complete
+POST /login through the Flask test client (user lookup, verification,
+session cookie), single-threaded, on a scratch database. Hashing holds
+the GIL, so one process is one core: multiply logins/s by worker
+processes for a server's burst capacity.
+
+    python benchmarks/login_hashing.py --seconds 3
+    python benchmarks/login_hashing.py --method scrypt:32768:8:1 --method pbkdf2:sha256:600000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+METHODS = [
+    "scrypt:32768:8:1",      # werkzeug 2.3 default
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000",  # werkzeug 3 default, OWASP 2023 minimum for PBKDF2-SHA256
+    "pbkdf2:sha256:260000",  # werkzeug 2.0-2.2 default
+]
+PASSWORD = "correct horse battery staple"
+
+
+def timed(fn, seconds):
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        fn()
+        count += 1
+    elapsed = time.perf_counter() - started
+    return count / elapsed, elapsed / count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--method", action="append", help="hash method to test (repeatable)")
+    parser.add_argument("--seconds", type=float, default=3, help="time per measurement")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'login.db')}"
+    from werkzeug.security import check_password_hash, generate_password_hash
+    from app import create_app
+    from migrations import init_db
+    from models import db, User
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+
+    results = []
+    for method in args.method or METHODS:
+        app.config["PASSWORD_HASH_METHOD"] = method
+        pwhash = generate_password_hash(PASSWORD, method)
+        with app.app_context():
+            email = f"{method.replace(':', '-')}@bench.test"
+            db.session.add(User(role="worker", name="Bench", email=email, password=pwhash,
+                                aadhar="0", is_approved=True))
+            db.session.commit()
+
+        verify_rate, verify_ms = timed(lambda: check_password_hash(pwhash, PASSWORD), args.seconds)
+
+        def login():
+            response = app.test_client().post("/login", data={"email": email, "password": PASSWORD})
+            assert response.status_code == 302 and "login" not in response.location, response.location
+        login_rate, login_ms = timed(login, args.seconds)
+        results.append({"method": method, "verify_per_sec": round(verify_rate, 1), "verify_ms": round(verify_ms, 2),
+                        "logins_per_sec_per_core": round(login_rate, 1), "login_ms": round(login_ms, 2)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'method':<24}{'verify/s':>10}{'verify ms':>11}{'logins/s/core':>15}{'login ms':>10}")
+    for r in results:
+        print(f"{r['method']:<24}{r['verify_per_sec']:>10}{r['verify_ms']:>11}"
+              f"{r['logins_per_sec_per_core']:>15}{r['login_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Benchmark driver: a weighted mix of the app's hot paths against a seeded
+database (see seed.py), reporting throughput and latency percentiles per
+scenario and saving the numbers as JSON for later comparison.
+
+Two modes:
+  client  in-process Flask test client; measures the app alone
+  http    --procs processes issuing real HTTP to a running server
+          (flask run / gunicorn), including the server and network stack
+
+    python benchmarks/seed.py --db instance/bench.db
+    python benchmarks/run.py --db instance/bench.db --mode client --seconds 20
+    DATABASE_URL=sqlite:///$PWD/instance/bench.db gunicorn -w 4 "app:create_app()" &
+    python benchmarks/run.py --db instance/bench.db --mode http --url http://127.0.0.1:8000 --procs 8
+    python benchmarks/run.py ... --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import http.cookiejar
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.seed import SEED_PASSWORD  # noqa: E402
+
+SEARCH_TERMS = ["plumb", "electric", "paint", "clean", "cook", "repair", "driving", ""]
+
+# scenario -> (role, weight)
+SCENARIOS = {
+    "login": (None, 8),
+    "find_jobs": ("worker", 25),
+    "apply_job": ("worker", 10),
+    "chat_view": (None, 10),
+    "chat_send": (None, 10),
+    "notifications": (None, 17),
+    "client_dashboard": ("client", 20),
+}
+
+
+# ----------- FIXTURES FROM THE SEEDED DATABASE -----------
+
+def load_fixtures(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        def column(sql):
+            return [row[0] for row in conn.execute(sql)]
+        return {
+            "workers": column("SELECT email FROM user WHERE role = 'worker' AND is_approved = 1"),
+            "clients": column("SELECT email FROM user WHERE role = 'client' AND is_approved = 1"),
+            "open_jobs": column("SELECT id FROM job WHERE is_open = 1"),
+            # (email, partner id) for both sides of every conversation
+            "chats": [tuple(row) for row in conn.execute(
+                "SELECT u.email, c.user_high_id FROM conversation c JOIN user u ON u.id = c.user_low_id "
+                "UNION ALL "
+                "SELECT u.email, c.user_low_id FROM conversation c JOIN user u ON u.id = c.user_high_id"
+            )],
+        }
+    finally:
+        conn.close()
+
+
+# ----------- SESSIONS -----------
+
+class TestClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, headers=None):
+        response = self.client.open(path, method=method, data=data, headers=headers)
+        response.close()
+        return response.status_code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+    def request(self, method, path, data=None, headers=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers or {})
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            return exc.code
+
+
+# ----------- WORKLOAD -----------
+
+class VirtualUser:
+    """One simulated browser pair: a logged-in worker and a logged-in client."""
+
+    def __init__(self, new_session, fixtures, rng):
+        self.new_session = new_session
+        self.fixtures = fixtures
+        self.rng = rng
+        self.worker = self.login(rng.choice(fixtures["workers"]))[0]
+        self.client = self.login(rng.choice(fixtures["clients"]))[0]
+        email, self.partner = rng.choice(fixtures["chats"]) if fixtures["chats"] else (None, None)
+        self.chatter = self.login(email)[0] if email else self.worker
+
+    def login(self, email):
+        session = self.new_session()
+        status = session.request("POST", "/login", {"email": email, "password": SEED_PASSWORD})
+        return session, status
+
+    def run(self, scenario):
+        rng = self.rng
+        if scenario == "login":
+            pool = self.fixtures["workers"] + self.fixtures["clients"]
+            return self.login(rng.choice(pool))[1]
+        if scenario == "find_jobs":
+            term = rng.choice(SEARCH_TERMS)
+            return self.worker.request("GET", "/find_jobs" + (f"?search={term}" if term else ""))
+        if scenario == "apply_job":
+            return self.worker.request("POST", f"/apply/{rng.choice(self.fixtures['open_jobs'])}")
+        if scenario == "chat_view":
+            return self.chatter.request("GET", f"/chat/{self.partner}")
+        if scenario == "chat_send":
+            return self.chatter.request("POST", f"/chat/{self.partner}", {"message": "benchmark message"},
+                                        {"X-Requested-With": "XMLHttpRequest"})
+        if scenario == "notifications":
+            return rng.choice((self.worker, self.client)).request("GET", "/notifications")
+        if scenario == "client_dashboard":
+            return self.client.request("GET", "/client/dashboard")
+        raise ValueError(scenario)
+
+
+def drive(new_session, fixtures, seconds, seed, scenarios):
+    """Run the mix for `seconds`; returns {scenario: {"latencies": [...], "errors": n}}."""
+    rng = random.Random(seed)
+    user = VirtualUser(new_session, fixtures, rng)
+    names = list(scenarios)
+    weights = [SCENARIOS[name][1] for name in names]
+    results = {name: {"latencies": [], "errors": 0} for name in names}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            status = user.run(name)
+        except Exception:
+            status = None
+        elapsed = time.perf_counter() - started
+        if status is None or status >= 400:
+            results[name]["errors"] += 1
+        else:
+            results[name]["latencies"].append(elapsed)
+    return results
+
+
+def _http_worker(url, fixtures, seconds, seed, scenarios, queue):
+    queue.put(drive(lambda: HttpSession(url), fixtures, seconds, seed, scenarios))
+
+
+def run_client_mode(args, fixtures, scenarios):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    from app import create_app
+    app = create_app()
+    merged = []
+    threads = [
+        threading.Thread(target=lambda i=i: merged.append(
+            drive(lambda: TestClientSession(app), fixtures, args.seconds, args.seed + i, scenarios)))
+        for i in range(args.threads)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return merged
+
+
+def run_http_mode(args, fixtures, scenarios):
+    queue = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_http_worker,
+                                args=(args.url, fixtures, args.seconds, args.seed + i, scenarios, queue))
+        for i in range(args.procs)
+    ]
+    for p in procs:
+        p.start()
+    merged = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return merged
+
+
+# ----------- REPORTING -----------
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def summarize(merged, seconds):
+    def stats(latencies, errors):
+        ordered = sorted(latencies)
+        ms = lambda value: round(value * 1000, 2) if value is not None else None  # noqa: E731
+        return {
+            "requests": len(ordered),
+            "errors": errors,
+            "rps": round(len(ordered) / seconds, 1),
+            "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+            "p50_ms": ms(percentile(ordered, 50)),
+            "p95_ms": ms(percentile(ordered, 95)),
+            "p99_ms": ms(percentile(ordered, 99)),
+        }
+
+    scenarios, everything, total_errors = {}, [], 0
+    for name in merged[0]:
+        latencies = [l for part in merged for l in part[name]["latencies"]]
+        errors = sum(part[name]["errors"] for part in merged)
+        scenarios[name] = stats(latencies, errors)
+        everything += latencies
+        total_errors += errors
+    return {"scenarios": scenarios, "total": stats(everything, total_errors)}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    header = f"{'scenario':<18}{'req':>7}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    rows = list(report["scenarios"].items()) + [("TOTAL", report["total"])]
+    for name, s in rows:
+        line = (f"{name:<18}{s['requests']:>7}{s['errors']:>5}{s['rps']:>9}"
+                f"{s['p50_ms'] or '-':>9}{s['p95_ms'] or '-':>9}{s['p99_ms'] or '-':>9}")
+        if baseline:
+            old = baseline["total"] if name == "TOTAL" else baseline["scenarios"].get(name)
+            if old and old.get("p95_ms") and s.get("p95_ms"):
+                line += f"   p95 {100 * (s['p95_ms'] - old['p95_ms']) / old['p95_ms']:+.0f}%"
+                line += f"  rps {100 * (s['rps'] - old['rps']) / old['rps']:+.0f}%" if old["rps"] else ""
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default="instance/bench.db", help="seeded database (for fixtures)")
+    parser.add_argument("--mode", choices=("client", "http"), default="client")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="server for --mode http")
+    parser.add_argument("--procs", type=int, default=4, help="driver processes for --mode http")
+    parser.add_argument("--threads", type=int, default=1, help="driver threads for --mode client")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", help="comma-separated scenarios to run (default: the full mix)")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<mode>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    scenarios = args.only.split(",") if args.only else list(SCENARIOS)
+    fixtures = load_fixtures(args.db)
+    run = run_client_mode if args.mode == "client" else run_http_mode
+    report = summarize(run(args, fixtures, scenarios), args.seconds)
+    report["meta"] = {
+        "mode": args.mode,
+        "revision": git_revision(),
+        "started": datetime.utcnow().isoformat(timespec="seconds"),
+        "seconds": args.seconds,
+        "concurrency": args.procs if args.mode == "http" else args.threads,
+        "python": platform.python_version(),
+        "db": os.path.abspath(args.db),
+        "url": args.url if args.mode == "http" else None,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    out = args.out or os.path.join(
+        ROOT, "benchmarks", "results", f"{args.mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Synthetic data generator for benchmarks.
+
+Builds a fresh SQLite database through the app's own schema and upgrade
+path, then bulk-inserts users, jobs, applications, hires, messages,
+ratings and notifications with skewed, roughly realistic distributions:
+a few popular skills and busy clients, most conversations short and a
+few long, ratings leaning 4-5 stars, most old notifications read.
+Denormalized data (skill tags, rating aggregates, conversations,
+coordinates) is rebuilt with the same functions the migrations use, so
+the result looks like a database the app has been writing for a while.
+
+    python benchmarks/seed.py --db /tmp/bench.db --workers 2000 --clients 500
+
+Every seeded account uses SEED_PASSWORD; emails are worker<N>@bench.test
+and client<N>@bench.test.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SEED_PASSWORD = "benchpass"
+CHUNK = 1000
+
+SKILLS = [
+    "plumbing", "electrician", "carpentry", "painting", "cleaning", "cooking", "driving",
+    "gardening", "masonry", "welding", "tailoring", "babysitting", "tutoring", "plastering",
+    "tiling", "roofing", "ac repair", "appliance repair", "pest control", "moving",
+    "laundry", "security guard", "beautician", "photography", "catering", "interior design",
+]
+CITIES = ["Hyderabad", "Bengaluru", "Chennai", "Mumbai", "Pune", "Delhi", "Kolkata", "Vizag",
+          "Warangal", "Vijayawada", "Mysuru", "Coimbatore"]
+JOB_TEMPLATES = [
+    "Need {skill} for {place}", "Urgent {skill} work", "{skill} help this weekend",
+    "Looking for experienced {skill} professional", "Part-time {skill} needed",
+]
+PLACES = ["2BHK flat", "office", "shop", "villa", "restaurant", "warehouse", "school"]
+CHAT_LINES = [
+    "Hi, are you available tomorrow?", "Yes, what time works for you?", "Around 10 am.",
+    "Please share the address.", "Sent. How much will it cost?", "Depends on the work, I'll check.",
+    "Okay, see you then.", "Reached, please open the gate.", "Work is done, thank you!",
+]
+REVIEWS = ["Great work", "On time and polite", "Good, but a bit late", "Excellent!", "Average job", None]
+
+
+def zipf_choice(rng, items, s=1.1):
+    """Pick from `items` with Zipf-like weights: early items are much more popular."""
+    weights = [1 / (rank ** s) for rank in range(1, len(items) + 1)]
+    return rng.choices(items, weights)[0]
+
+
+def heavy_tail(rng, mean, cap):
+    """Geometric-ish count with the given mean, capped (most small, a few big)."""
+    return min(int(rng.expovariate(1 / mean)), cap)
+
+
+def bulk_insert(db, model, rows):
+    from sqlalchemy import insert
+    for i in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[i:i + CHUNK])
+
+
+def seed(args):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from migrations import init_db
+    from models import db, User, Job, Application, Hire, Message, Rating, Notification
+    from skills import rebuild_user_skills
+    import geo
+    import rollups
+    from utils import backfill_conversations, recompute_rating_aggregates
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+
+    def past(days):
+        return now - timedelta(seconds=rng.uniform(0, days * 86400))
+
+    counts = {}
+    started = time.perf_counter()
+    app = create_app()
+    with app.app_context():
+        init_db()  # the schema and the admin user
+        password = generate_password_hash(SEED_PASSWORD)  # hashing is slow; share one
+
+        users = []
+        for i in range(args.workers):
+            skills = {zipf_choice(rng, SKILLS) for _ in range(rng.randint(1, 4))}
+            approved = rng.random() < 0.9
+            users.append(dict(
+                role="worker", name=f"Worker {i}", email=f"worker{i}@bench.test", password=password,
+                aadhar=f"{rng.randrange(10 ** 11, 10 ** 12)}", skills=", ".join(sorted(skills)),
+                is_approved=approved, reviewed_at=past(90) if approved else None, created_at=past(120),
+                bio="", phone=f"9{rng.randrange(10 ** 8, 10 ** 9)}",
+                location=zipf_choice(rng, CITIES),
+            ))
+        for i in range(args.clients):
+            approved = rng.random() < 0.95
+            users.append(dict(
+                role="client", name=f"Client {i}", email=f"client{i}@bench.test", password=password,
+                aadhar=f"{rng.randrange(10 ** 11, 10 ** 12)}", is_approved=approved,
+                reviewed_at=past(90) if approved else None, created_at=past(120), bio="",
+                phone=f"8{rng.randrange(10 ** 8, 10 ** 9)}", location=zipf_choice(rng, CITIES),
+            ))
+        bulk_insert(db, User, users)
+        db.session.commit()
+
+        worker_ids = [uid for (uid,) in db.session.query(User.id).filter_by(role="worker", is_approved=True)]
+        client_ids = [uid for (uid,) in db.session.query(User.id).filter_by(role="client", is_approved=True)]
+        counts["users"] = len(users)
+
+        jobs = []
+        for client_id in client_ids:
+            for _ in range(heavy_tail(rng, args.jobs_per_client, 40)):
+                skill = zipf_choice(rng, SKILLS)
+                jobs.append(dict(
+                    title=rng.choice(JOB_TEMPLATES).format(skill=skill, place=rng.choice(PLACES)).capitalize(),
+                    description=f"Looking for someone skilled in {skill}. {rng.choice(PLACES).capitalize()}, "
+                                f"{rng.randint(1, 8)} hours of work.",
+                    location=zipf_choice(rng, CITIES), client_id=client_id,
+                    created_at=past(90), is_open=rng.random() < 0.7,
+                ))
+        bulk_insert(db, Job, jobs)
+        db.session.commit()
+        job_rows = db.session.query(Job.id, Job.client_id, Job.created_at).all()
+        counts["jobs"] = len(job_rows)
+
+        applications, hires, pairs = [], [], set()
+        for job_id, client_id, created_at in job_rows:
+            applicants = rng.sample(worker_ids, min(heavy_tail(rng, args.applications_per_job, 50), len(worker_ids)))
+            hired = applicants and rng.random() < 0.4
+            for i, worker_id in enumerate(applicants):
+                applied = created_at + timedelta(hours=rng.uniform(1, 72))
+                # like the hire routes: the hired applicant's application is marked hired
+                is_hire = hired and i == 0
+                changed = applied + timedelta(hours=rng.uniform(1, 48)) if is_hire else applied
+                applications.append(dict(job_id=job_id, worker_id=worker_id, client_id=client_id,
+                                         status="hired" if is_hire else "applied", timestamp=applied,
+                                         updated_at=changed))
+            if hired:
+                worker_id = applicants[0]
+                hires.append(dict(client_id=client_id, worker_id=worker_id, job_id=job_id, status="hired"))
+                pairs.add((client_id, worker_id, job_id))
+        bulk_insert(db, Application, applications)
+        bulk_insert(db, Hire, hires)
+        counts["applications"], counts["hires"] = len(applications), len(hires)
+
+        messages, ratings = [], []
+        for client_id, worker_id, job_id in pairs:
+            stamp = past(60)
+            for n in range(max(1, heavy_tail(rng, args.messages_per_chat, 400))):
+                sender, receiver = (client_id, worker_id) if n % 2 == 0 else (worker_id, client_id)
+                stamp += timedelta(minutes=rng.uniform(1, 600))
+                messages.append(dict(sender_id=sender, receiver_id=receiver, content=rng.choice(CHAT_LINES),
+                                     timestamp=min(stamp, now), is_read=rng.random() < 0.85))
+            if rng.random() < 0.6:
+                ratings.append(dict(recipient_id=worker_id, author_id=client_id, job_id=job_id,
+                                    score=rng.choices([1, 2, 3, 4, 5], [3, 5, 12, 35, 45])[0],
+                                    comment=rng.choice(REVIEWS), created_at=past(30)))
+            if rng.random() < 0.3:
+                ratings.append(dict(recipient_id=client_id, author_id=worker_id, job_id=job_id,
+                                    score=rng.choices([1, 2, 3, 4, 5], [2, 4, 10, 40, 44])[0],
+                                    comment=rng.choice(REVIEWS), created_at=past(30)))
+        messages.sort(key=lambda row: row["timestamp"])
+        bulk_insert(db, Message, messages)
+        bulk_insert(db, Rating, ratings)
+        counts["messages"], counts["ratings"] = len(messages), len(ratings)
+
+        notifications = []
+        for user_id in worker_ids + client_ids:
+            for _ in range(heavy_tail(rng, args.notifications_per_user, 200)):
+                stamp = past(90)
+                notifications.append(dict(user_id=user_id, message=f"New Job: {zipf_choice(rng, SKILLS)} work",
+                                          timestamp=stamp, is_read=stamp < now - timedelta(days=3) or rng.random() < 0.3))
+        bulk_insert(db, Notification, notifications)
+        db.session.commit()
+        counts["notifications"] = len(notifications)
+
+        rebuild_user_skills()
+        recompute_rating_aggregates()
+        counts["conversations"] = backfill_conversations()
+        counts["geocoded"] = geo.backfill()
+        counts["rollup rows"] = rollups.rebuild()
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default="instance/bench.db", help="database file (replaced)")
+    parser.add_argument("--workers", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--jobs-per-client", type=float, default=4)
+    parser.add_argument("--applications-per-job", type=float, default=5)
+    parser.add_argument("--messages-per-chat", type=float, default=12)
+    parser.add_argument("--notifications-per-user", type=float, default=15)
+    parser.add_argument("--seed", type=int, default=42, help="random seed, for reproducible data")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    counts = seed(args)
+    print(", ".join(f"{name}: {value}" for name, value in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
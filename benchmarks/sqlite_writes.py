@@ -0,0 +1,157 @@
+"""
+Concurrent write throughput on SQLite, before and after the connection
+tuning in database.py.
+
+Each run creates a fresh database file and starts --procs processes (think
+gunicorn workers) with --threads threads each. Writers do what a chat POST
+does: insert a Message and bump its Conversation in one transaction.
+Readers page through the thread like the chat view. "default" is the
+previous setup (rollback journal, stock pool); "tuned" uses
+database.engine_options() and the Config pragmas.
+
+    python benchmarks/sqlite_writes.py --procs 4 --threads 4 --seconds 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+import database
+from config import Config
+from models import db, Message, Conversation
+
+CONFIG = {k: getattr(Config, k) for k in dir(Config) if k.isupper()}
+
+
+def make_engine(mode, path):
+    uri = f"sqlite:///{path}"
+    if mode == "default":
+        return create_engine(uri)
+    config = dict(CONFIG, SQLALCHEMY_DATABASE_URI=uri)
+    engine = create_engine(uri, **database.engine_options(config))
+    pragmas = database.sqlite_pragmas(config)
+    event.listen(engine, "connect", lambda conn, record: database.apply_pragmas(conn, pragmas))
+    return engine
+
+
+def setup(mode, path):
+    engine = make_engine(mode, path)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Conversation), [{"id": 1, "user_low_id": 1, "user_high_id": 2}])
+    engine.dispose()
+
+
+def write_once(conn, n):
+    with conn.begin():
+        result = conn.execute(insert(Message).values(
+            sender_id=1, receiver_id=2, conversation_id=1, content=f"message {n}"
+        ))
+        conn.execute(update(Conversation).where(Conversation.id == 1).values(
+            last_message_id=result.inserted_primary_key[0],
+            unread_high=Conversation.unread_high + 1,
+        ))
+
+
+def read_once(conn, n):
+    conn.execute(
+        select(Message.id, Message.content).where(Message.conversation_id == 1)
+        .order_by(Message.id.desc()).limit(20)
+    ).all()
+    conn.rollback()
+
+
+def worker(mode, path, threads, readers, seconds, results):
+    engine = make_engine(mode, path)
+    deadline = time.monotonic() + seconds
+    lock = threading.Lock()
+    totals = {"writes": 0, "reads": 0, "locked": 0, "latencies": []}
+
+    def run(op):
+        n = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    op(conn, n)
+            except OperationalError as exc:
+                if "locked" not in str(exc) and "busy" not in str(exc):
+                    raise
+                with lock:
+                    totals["locked"] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                if op is write_once:
+                    totals["writes"] += 1
+                    totals["latencies"].append(elapsed)
+                else:
+                    totals["reads"] += 1
+            n += 1
+
+    pool = [threading.Thread(target=run, args=(read_once if i < readers else write_once,))
+            for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    engine.dispose()
+    results.put(totals)
+
+
+def bench(mode, procs, threads, readers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        setup(mode, path)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=worker, args=(mode, path, threads, readers, seconds, results))
+                   for _ in range(procs)]
+        for p in workers:
+            p.start()
+        totals = [results.get() for _ in workers]
+        for p in workers:
+            p.join()
+
+    latencies = sorted(l for t in totals for l in t["latencies"])
+    writes = sum(t["writes"] for t in totals)
+    return {
+        "mode": mode,
+        "writes_per_sec": round(writes / seconds, 1),
+        "reads_per_sec": round(sum(t["reads"] for t in totals) / seconds, 1),
+        "locked_errors": sum(t["locked"] for t in totals),
+        "write_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "write_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=1, help="reader threads per process")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--mode", choices=("default", "tuned", "both"), default="both")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    modes = ("default", "tuned") if args.mode == "both" else (args.mode,)
+    results = [bench(mode, args.procs, args.threads, args.readers, args.seconds) for mode in modes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['mode']:>8}: {r['writes_per_sec']:>8} writes/s  {r['reads_per_sec']:>8} reads/s  "
+              f"p50 {r['write_p50_ms']} ms  p99 {r['write_p99_ms']} ms  locked {r['locked_errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Worker startup time: import to first response, per web worker process.
+
+Prepares a database once with `flask init-db` (as a deploy would), then
+starts --workers fresh Python processes, one after another or all at once
+with --concurrent (a gunicorn master starting its workers). Each worker
+imports app, calls create_app() and serves its first request through the
+test client, timing the three steps; the total runs from process spawn to
+that first response, interpreter startup included. Also reports whether
+numpy/scipy and wtforms were imported, which startup should not need.
+
+    python benchmarks/startup.py --workers 8 --concurrent
+    python benchmarks/startup.py --db instance/bench.db --path /login --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY = ("numpy", "scipy", "wtforms")
+STEPS = ("import_ms", "create_app_ms", "first_request_ms", "total_ms")
+
+
+def worker(path):
+    """Runs in the child: time import, create_app() and the first request, print one JSON line."""
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    response = app.test_client().get(path)
+    served = time.perf_counter()
+    print(json.dumps({
+        "ready_at": time.time(),
+        "status": response.status_code,
+        "import_ms": round((imported - started) * 1000, 1),
+        "create_app_ms": round((created - imported) * 1000, 1),
+        "first_request_ms": round((served - created) * 1000, 1),
+        "loaded": [name for name in HEAVY if name in sys.modules],
+    }))
+
+
+def spawn(path, env):
+    return time.time(), subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--worker", "--path", path],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+    )
+
+
+def collect(spawned_at, proc):
+    out, _ = proc.communicate()
+    if proc.returncode:
+        raise SystemExit(f"worker exited with {proc.returncode}")
+    result = json.loads(out.strip().splitlines()[-1])
+    result["total_ms"] = round((result.pop("ready_at") - spawned_at) * 1000, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4, help="worker processes to start")
+    parser.add_argument("--concurrent", action="store_true", help="start all workers at once")
+    parser.add_argument("--path", default="/", help="the first request each worker serves")
+    parser.add_argument("--db", help="existing SQLite file (default: a scratch database)")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.path)
+        return
+
+    db_path = os.path.abspath(args.db) if args.db else os.path.join(tempfile.mkdtemp(), "startup.db")
+    # no background task threads or queued retention: only startup is timed
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", TASK_WORKERS="0", RETENTION_ENABLED="0")
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "init-db"], cwd=ROOT, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+    init_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    if args.concurrent:
+        procs = [spawn(args.path, env) for _ in range(args.workers)]
+        results = [collect(*proc) for proc in procs]
+    else:
+        results = [collect(*spawn(args.path, env)) for _ in range(args.workers)]
+
+    summary = {
+        "init_db_ms": init_ms,
+        "workers": results,
+        "median": {step: round(statistics.median(r[step] for r in results), 1) for step in STEPS},
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"flask init-db (once per deploy): {init_ms} ms")
+    print(f"{'worker':<8}{'import ms':>11}{'create_app ms':>15}{'1st request ms':>16}{'total ms':>10}  status  loaded")
+    for i, r in enumerate(results):
+        print(f"{i:<8}{r['import_ms']:>11}{r['create_app_ms']:>15}{r['first_request_ms']:>16}{r['total_ms']:>10}"
+              f"  {r['status']:<6}  {', '.join(r['loaded']) or '-'}")
+    m = summary["median"]
+    print(f"{'median':<8}{m['import_ms']:>11}{m['create_app_ms']:>15}{m['first_request_ms']:>16}{m['total_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
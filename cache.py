@@ -0,0 +1,170 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # only needed when CACHE_REDIS_URL is set
+    redis = None
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 1024
+
+# version namespace for everything rendered from approved workers' profiles
+WORKER_LISTINGS = "workers"
+
+
+class MemoryCache:
+    """
+    Per-process LRU with a TTL per entry. Counters live outside the LRU so
+    a version number is never evicted and reset under load.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._counters = {}
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            if hit[1] is not None and hit[1] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return hit[0]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """
+    The same interface over anything speaking the redis-py client API
+    (Redis, Valkey, KeyDB, or a fake in development), shared by all workers.
+    """
+
+    def __init__(self, client, prefix="skilllink:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url):
+        if redis is None:
+            raise RuntimeError("CACHE_REDIS_URL is set but the redis package is not installed")
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    Caches rendered fragments and JSON pages under version counters.
+
+    Every entry is stored under the current version of the namespaces it
+    depends on; bump() moves a namespace to a new version, so all entries
+    built from older data simply stop being looked up and age out of the
+    LRU / TTL. Version reads and bumps go through the backend, so with a
+    shared backend every worker process sees an invalidation at once.
+    """
+
+    def __init__(self, app=None):
+        self.backend = MemoryCache()
+        self.ttl = DEFAULT_TTL
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("CACHE_ENABLED", True)
+        app.config.setdefault("CACHE_TTL", DEFAULT_TTL)
+        app.config.setdefault("CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+        app.config.setdefault("CACHE_REDIS_URL", None)
+        app.config.setdefault("CACHE_BACKEND", None)
+
+        self.enabled = app.config["CACHE_ENABLED"]
+        self.ttl = app.config["CACHE_TTL"]
+        if app.config["CACHE_BACKEND"] is not None:
+            self.backend = app.config["CACHE_BACKEND"]
+        elif app.config["CACHE_REDIS_URL"]:
+            self.backend = RedisCache.from_url(app.config["CACHE_REDIS_URL"])
+        else:
+            self.backend = MemoryCache(app.config["CACHE_MAX_ENTRIES"])
+        app.extensions["response_cache"] = self
+
+    def version(self, namespace):
+        return self.backend.counter(f"version:{namespace}")
+
+    def bump(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.incr(f"version:{namespace}")
+
+    def key(self, namespaces, parts):
+        versions = ",".join(f"{ns}={self.version(ns)}" for ns in namespaces)
+        return f"{versions}|" + "|".join(str(part) for part in parts)
+
+    def get_or_set(self, namespaces, parts, producer, ttl=None):
+        """
+        Return the cached value for `parts` under the current versions of
+        `namespaces`, calling producer() to build and store it on a miss.
+        """
+        if not self.enabled:
+            return producer()
+        key = self.key(namespaces, parts)
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = producer()
+        self.backend.set(key, value, ttl or self.ttl)
+        return value
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,213 @@
+"""
+Client pages: dashboard, job posting, finding and hiring workers.
+"""
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy.orm import joinedload
+
+import geo
+import rollups
+from counters import unread
+from fanout import fanout
+from listings import cached_listing
+from models import db, Application, Hire, Job, User
+from pagination import keyset_page, offset_page, page_args, page_json, wants_json
+from recommend import match_scores, recommended_workers
+from search import search_workers
+from serializers import application_json
+from skills import skill_index, workers_page
+from tasks import tasks
+from utils import is_hired, queue_notifications
+
+clients = Blueprint("clients", __name__)
+
+
+@clients.route('/client/dashboard')
+@login_required
+def dashboard():
+    if current_user.role != 'client':
+        return redirect('/')
+
+    jobs = Job.query.filter_by(client_id=current_user.id).all()
+    hired_ids = sorted({worker_id for (worker_id,) in db.session.query(Hire.worker_id).filter_by(
+        client_id=current_user.id, status='hired')})
+    unread_count = unread.get("notifications", current_user.id)
+
+    # the worker grid only differs by which workers this client has hired
+    workers_grid = cached_listing(
+        "dashboard_workers_grid.html",
+        lambda: User.query.filter_by(role='worker', is_approved=True).all(),
+        key=hired_ids, hired_ids=set(hired_ids),
+    )
+
+    return render_template(
+        'client_dashboard.html',
+        jobs=jobs,
+        workers_grid=workers_grid,
+        unread_count=unread_count
+    )
+
+
+@clients.route('/client/post_job', methods=['GET', 'POST'])
+@login_required
+def post_job():
+    if current_user.role != 'client': return redirect('/')
+
+    if request.method == 'POST':
+        job = Job(title=request.form['title'], description=request.form['description'],
+                  location=request.form.get('location', '').strip() or None, client_id=current_user.id)
+        geo.locate(job)
+        db.session.add(job)
+        db.session.flush()
+
+        # only workers whose skill tags appear in the job text; the fan-out
+        # and matching run as tasks committed together with the job
+        worker_ids = skill_index.match_text(f"{job.title} {job.description}")
+        fanout.dispatch(sorted(worker_ids), f"New Job: {job.title}")
+        tasks.enqueue("recommend.job", job_id=job.id)
+        rollups.incr(rollups.JOBS)
+        db.session.commit()
+
+        flash("Job Posted Successfully!")
+        return redirect(url_for('clients.dashboard'))
+
+    return render_template('post_job.html')
+
+@clients.route('/find_workers', methods=['GET'])
+@login_required
+def find_workers():
+    if current_user.role != 'client':
+        return redirect('/')
+
+    skill = request.args.get('skill', '')
+    location = request.args.get('location', '').strip()
+    radius = geo.radius_arg(request.args)
+    cursor, limit = page_args()
+
+    # within `radius` km of a known city, nearest first; an unknown place is
+    # matched against the location text. Otherwise exact/prefix skill tags
+    # first, full-text over the skills blob when no tag matches
+    place = geo.geocode(location) if location else None
+    text_location = location if not place else ""
+
+    def find_page():
+        if place:
+            return offset_page(search_workers(skill, near=(place[1:], radius)), cursor, limit)
+        page = workers_page(skill, cursor, limit) if skill and not text_location else None
+        if page is None:
+            if skill:
+                page = offset_page(search_workers(skill, text_location), cursor, limit)
+            else:
+                page = keyset_page(search_workers(location=text_location), User.id, cursor, limit,
+                                   descending=False)
+        return page
+
+    listing = cached_listing("find_workers_grid.html", find_page)
+    if wants_json():
+        return jsonify(listing)
+
+    return render_template("find_workers.html", workers_grid=listing, skill=skill, location=location,
+                           radius=radius, place=place)
+
+
+@clients.route('/workers')
+@login_required
+def workers():
+    cursor, limit = page_args()
+    listing = cached_listing("workers_grid.html", lambda: keyset_page(
+        User.query.filter_by(role='worker', is_approved=True), User.id, cursor, limit, descending=False))
+    if wants_json():
+        return jsonify(listing)
+    return render_template("workers.html", workers_grid=listing)
+
+
+# ----------- HIRE (AJAX-aware) -----------
+@clients.route('/hire/<int:worker_id>')
+@login_required
+def hire_select_job(worker_id):
+    if current_user.role != 'client':
+        flash("Only clients can hire workers.", "error")
+        return redirect('/')
+
+    worker = User.query.get_or_404(worker_id)
+    jobs = Job.query.filter_by(client_id=current_user.id, is_open=True).all()
+
+    # best-fitting job first, and other workers who fit these jobs well
+    scores = match_scores(worker.id, [job.id for job in jobs])
+    jobs.sort(key=lambda job: scores.get(job.id, 0), reverse=True)
+    recommended = recommended_workers([job.id for job in jobs], exclude=(worker.id,))
+
+    return render_template("hire_select_job.html", worker=worker, jobs=jobs, scores=scores, recommended=recommended)
+
+
+@clients.route('/hire/<int:worker_id>/<int:job_id>', methods=['POST', 'GET'])
+@login_required
+def hire(worker_id, job_id):
+    if current_user.role != 'client':
+        if request.is_json or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return jsonify({"ok": False, "msg": "Only clients can hire."}), 403
+        flash("Only clients can hire workers.", "error")
+        return redirect(url_for('accounts.index'))
+
+    worker = User.query.get_or_404(worker_id)
+    job = Job.query.get_or_404(job_id)
+
+    if job.client_id != current_user.id:
+        if request.is_json or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return jsonify({"ok": False, "msg": "You cannot hire for jobs you didn't post."}), 403
+        flash("You cannot hire for jobs you did not post.", "error")
+        return redirect(url_for('clients.dashboard'))
+
+    application = Application.query.filter_by(worker_id=worker.id, job_id=job.id).first()
+    if not application:
+        application = Application(worker_id=worker.id, job_id=job.id, client_id=job.client_id, status="hired")
+        db.session.add(application)
+        rollups.incr(rollups.APPLICATIONS)
+        rollups.incr(rollups.HIRES)
+    elif application.status != "hired":
+        application.status = "hired"
+        rollups.incr(rollups.HIRES)
+
+    job.is_open = False
+    # ✅ Notify the worker (queued in the same commit as the hire)
+    queue_notifications([worker.id], f"You were hired for job: {job.title}")
+    db.session.commit()
+
+    if request.is_json or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return jsonify({"ok": True, "msg": "Worker hired & notified."})
+
+    flash("✅ Worker Hired Successfully & Notified!", "success")
+    return redirect(url_for('clients.dashboard'))
+
+
+@clients.route('/applications')
+@login_required
+def view_applications():
+    if current_user.role != 'client':
+        return redirect('/')
+
+    cursor, limit = page_args()
+    applications = Application.query.options(
+        joinedload(Application.job), joinedload(Application.worker)
+    ).filter_by(client_id=current_user.id)
+    page = keyset_page(applications, Application.id, cursor, limit)
+    if wants_json():
+        return jsonify(page_json(page, application_json))
+    return render_template("applications.html", applications=page.items, next_cursor=page.next_cursor)
+
+# ----------- REVEAL CONTACT (used by client JS) -----------
+@clients.route('/reveal-contact/<int:worker_id>/<int:job_id>')
+@login_required
+def reveal_contact(worker_id, job_id):
+    if current_user.role != 'client':
+        return jsonify({"error": "Not allowed"}), 403
+
+    if not is_hired(worker_id, current_user.id):
+        return jsonify({"error": "Hire First"}), 403
+
+    worker = User.query.get_or_404(worker_id)
+    return jsonify({
+        "name": worker.name,
+        "email": worker.email,
+        "phone": worker.phone or "Not Provided"
+    })
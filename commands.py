@@ -0,0 +1,131 @@
+"""
+`flask ...` commands. Registered at the top level of the CLI: `flask init-db`.
+"""
+from flask import Blueprint, current_app
+
+import database
+import rollups
+from cache import response_cache, WORKER_LISTINGS
+from images import backfill_thumbnails
+from migrations import check_query_plans, init_db
+from models import db, Task
+from perf import check_query_budgets
+from recommend import recommender
+from retention import retention
+from skills import rebuild_user_skills
+from tasks import tasks
+from utils import recompute_rating_aggregates
+
+commands = Blueprint("commands", __name__, cli_group=None)
+
+
+@commands.cli.command("init-db")
+def init_db_command():
+    """Create or upgrade the schema and seed the admin account; run once per deploy."""
+    added = init_db()
+    for table, column in added:
+        print(f"added {table}.{column}")
+    print("Database is up to date.")
+
+
+@commands.cli.command("recompute-ratings")
+def recompute_ratings_command():
+    """Rebuild the denormalized rating aggregates on User."""
+    count = recompute_rating_aggregates()
+    response_cache.bump(WORKER_LISTINGS)
+    print(f"Recomputed ratings for {count} users.")
+
+
+@commands.cli.command("db-info")
+def db_info_command():
+    """Show the database URL, pool settings and (on SQLite) live pragmas."""
+    print(f"url: {db.engine.url.render_as_string(hide_password=True)}")
+    print(f"pool: {db.engine.pool.status()}")
+    if database.is_sqlite(current_app.config["SQLALCHEMY_DATABASE_URI"]):
+        for name, value in database.pragma_report().items():
+            print(f"{name}: {value}")
+
+
+@commands.cli.command("make-thumbnails")
+def make_thumbnails_command():
+    """Create missing WebP thumbnails for images uploaded before the pipeline."""
+    for key in ("UPLOAD_FOLDER", "PROFILE_PIC_FOLDER", "IMAGE_UPLOADS_FOLDER"):
+        count = backfill_thumbnails(current_app.config[key])
+        print(f"{current_app.config[key]}: {count} images thumbnailed")
+
+
+@commands.cli.command("check-indexes")
+def check_indexes_command():
+    """Fail if a hot route query's plan scans a table instead of an index."""
+    scans = check_query_plans()
+    for name, plan in scans.items():
+        print(f"SCAN  {name}: {'; '.join(plan)}")
+    if scans:
+        raise SystemExit(1)
+    print("All hot queries use an index.")
+
+
+@commands.cli.command("check-query-budget")
+def check_query_budget_command():
+    """Fail if a dashboard/list page issues more SQL statements than its budget."""
+    over = check_query_budgets(current_app._get_current_object())
+    for name, (count, budget, status) in over.items():
+        if count is None:
+            print(f"EMPTY {name}: no user has rows for this page; seed the database first")
+        else:
+            print(f"OVER  {name}: {count} statements (budget {budget}, HTTP {status})")
+    if over:
+        raise SystemExit(1)
+    print("All pages within their query budgets.")
+
+
+@commands.cli.command("rebuild-recommendations")
+def rebuild_recommendations_command():
+    """Recompute the precomputed job/worker match table from scratch."""
+    count = recommender.rebuild()
+    print(f"Stored {count} job/worker matches.")
+
+
+@commands.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Recompute the daily analytics rollups from the raw tables."""
+    count = rollups.rebuild()
+    print(f"Stored {count} daily rollup rows.")
+
+
+@commands.cli.command("run-retention")
+def run_retention_command():
+    """Run one retention pass now: purge and archive old rows, then reclaim space."""
+    for name, count in retention.run().items():
+        print(f"{name}: {count}")
+
+
+@commands.cli.command("vacuum")
+def vacuum_command():
+    """Rebuild the SQLite file with incremental auto-vacuum (locks the database while it runs)."""
+    retention.full_vacuum()
+    print("Database vacuumed; retention passes now reclaim free pages incrementally.")
+
+
+@commands.cli.command("run-tasks")
+def run_tasks_command():
+    """Run a background task worker in the foreground (TASK_WORKERS=0 in the web processes)."""
+    print("Running tasks; Ctrl-C to stop.")
+    tasks.run_forever()
+
+
+@commands.cli.command("task-status")
+def task_status_command():
+    """Count background tasks by status and show the latest failures."""
+    for status, count in sorted(tasks.status().items()):
+        print(f"{status}: {count}")
+    for task in Task.query.filter_by(status="failed").order_by(Task.id.desc()).limit(5):
+        error = (task.last_error or "").strip().splitlines()
+        print(f"FAILED #{task.id} {task.name} after {task.attempts} attempts: {error[-1] if error else ''}")
+
+
+@commands.cli.command("rebuild-skills")
+def rebuild_skills_command():
+    """Re-tokenize User.skills into Skill/UserSkill tags."""
+    count = rebuild_user_skills()
+    print(f"Rebuilt skill tags for {count} workers.")
@@ -1,6 +1,81 @@
 import os
+
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+
+def _database_url():
+    # Heroku-style URLs still say postgres://, which SQLAlchemy 2 rejects
+    url = os.environ.get("DATABASE_URL", "sqlite:///database.db")
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
 class Config:
-SECRET_KEY = os.environ.get('SECRET_KEY', 'dev_secret_for_local')
-SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'instance', 'skilllink.sqlite')
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SECRET_KEY = os.environ.get("SECRET_KEY", "skilllink_secret")
+
+    # a relative sqlite path lands in instance/ (instance/database.db)
+    SQLALCHEMY_DATABASE_URI = _database_url()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # connections per worker process; size to the worker's thread count
+    # (gunicorn --threads) so requests never queue on the pool itself
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
+    # applied to every new SQLite connection; see database.py
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_PRAGMAS = {
+        # first: only takes effect on a new file (`flask vacuum` converts an old one)
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,   # negative = KiB, so 64 MiB per connection
+    }
+
+    # static files: versioned URLs (?v=<hash>, see assets.py) are immutable;
+    # anything else revalidates hourly via ETag / Last-Modified. Behind a
+    # front server that honours X-Sendfile, let it stream the bytes.
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.environ.get("STATIC_MAX_AGE", 3600))
+    USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE") == "1"
+
+    # werkzeug hash spec for new passwords; older hashes are upgraded on login
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # seconds a cached principal (id, role, approval, name) is trusted per process
+    AUTH_PRINCIPAL_TTL = int(os.environ.get("AUTH_PRINCIPAL_TTL", 60))
+
+    # per-endpoint timings on /admin/perf and /metrics (perf.py)
+    PERF_PROFILING = os.environ.get("PERF_PROFILING") == "1"
+    PERF_METRICS_TOKEN = os.environ.get("PERF_METRICS_TOKEN")
+
+    # chat SSE (messaging.py): each open chat holds a request thread for up to
+    # CHAT_STREAM_SECONDS, so it is only for threaded or async workers
+    # (gunicorn -k gthread / gevent); otherwise chats poll for new messages.
+    # Streams recycle and EventSource reconnects; the server-side poll
+    # catches up from the DB on writes made by other workers.
+    CHAT_SSE = os.environ.get("CHAT_SSE") == "1"
+    CHAT_STREAM_SECONDS = 300
+    CHAT_POLL_SECONDS = 10
+
+    UPLOAD_FOLDER = "static/govt_ids"
+    PROFILE_PIC_FOLDER = "static/profile_pics"
+    IMAGE_UPLOADS_FOLDER = "static/uploads"
+
+    # background tasks (tasks.py): worker threads per process draining the
+    # task table; 0 leaves it to a separate `flask run-tasks` process.
+    # TASK_EAGER runs a request's tasks before it answers (tests, debugging).
+    TASK_WORKERS = int(os.environ.get("TASK_WORKERS", 2))
+    TASK_EAGER = os.environ.get("TASK_EAGER") == "1"
+
+    # retention (retention.py): a background pass every interval deletes read
+    # notifications and finished tasks and archives read messages older than
+    # these many days; 0 keeps them forever
+    RETENTION_ENABLED = os.environ.get("RETENTION_ENABLED", "1") == "1"
+    RETENTION_INTERVAL_SECONDS = int(os.environ.get("RETENTION_INTERVAL_SECONDS", 3600))
+    RETENTION_READ_NOTIFICATION_DAYS = int(os.environ.get("RETENTION_READ_NOTIFICATION_DAYS", 30))
+    RETENTION_MESSAGE_ARCHIVE_DAYS = int(os.environ.get("RETENTION_MESSAGE_ARCHIVE_DAYS", 180))
+    RETENTION_TASK_DAYS = int(os.environ.get("RETENTION_TASK_DAYS", 7))
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from sqlalchemy import event
+
+from models import db, Message, Notification
+
+DEFAULT_TTL = 30
+
+
+def _count_unread_notifications(user_id):
+    return db.session.query(db.func.count(Notification.id)).filter(
+        Notification.user_id == user_id, Notification.is_read == db.false()
+    ).scalar()
+
+
+def _count_unread_messages(user_id):
+    return db.session.query(db.func.count(Message.id)).filter(
+        Message.receiver_id == user_id, Message.is_read == db.false()
+    ).scalar()
+
+
+COUNTERS = {
+    "notifications": _count_unread_notifications,
+    "messages": _count_unread_messages,
+}
+
+
+class UnreadCounters:
+    """
+    Per-user unread counts for the navbar badges.
+
+    A miss runs one COUNT over the partial unread index; after that the
+    value is adjusted in place on create / mark-read and recounted once the
+    TTL expires, which bounds drift from writes made by other processes.
+    Writes that share a transaction use incr_on_commit(), so a rollback
+    leaves the counts alone.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = DEFAULT_TTL
+        self._lock = threading.Lock()
+        self._cache = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("UNREAD_COUNTER_TTL", DEFAULT_TTL)
+        self.ttl = app.config["UNREAD_COUNTER_TTL"]
+        # db.session is shared by every app; one pair of listeners serves them all
+        if not event.contains(db.session, "after_commit", self._after_commit):
+            event.listen(db.session, "after_commit", self._after_commit)
+            event.listen(db.session, "after_rollback", self._after_rollback)
+        app.extensions["unread_counters"] = self
+
+    def get(self, kind, user_id):
+        key = (kind, user_id)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and hit[1] > now:
+                return hit[0]
+        value = COUNTERS[kind](user_id)
+        with self._lock:
+            self._cache[key] = (value, now + self.ttl)
+        return value
+
+    def incr(self, kind, user_ids, amount=1):
+        with self._lock:
+            for user_id in user_ids:
+                hit = self._cache.get((kind, user_id))
+                if hit:
+                    self._cache[(kind, user_id)] = (hit[0] + amount, hit[1])
+
+    def incr_on_commit(self, kind, user_ids, amount=1):
+        """incr() once the current transaction commits; dropped if it rolls back."""
+        db.session.info.setdefault("unread_pending", []).append((kind, list(user_ids), amount))
+
+    def _after_commit(self, session):
+        for kind, user_ids, amount in session.info.pop("unread_pending", ()):
+            self.incr(kind, user_ids, amount)
+
+    def _after_rollback(self, session):
+        session.info.pop("unread_pending", None)
+
+    def decr(self, kind, user_id, amount=1):
+        with self._lock:
+            hit = self._cache.get((kind, user_id))
+            if hit:
+                self._cache[(kind, user_id)] = (max(hit[0] - amount, 0), hit[1])
+
+    def reset(self, kind, user_id):
+        """Record that the user has no unread items of this kind."""
+        with self._lock:
+            self._cache[(kind, user_id)] = (0, time.monotonic() + self.ttl)
+
+    def invalidate(self, kind, user_id):
+        with self._lock:
+            self._cache.pop((kind, user_id), None)
+
+
+unread = UnreadCounters()
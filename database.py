@@ -0,0 +1,75 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def _is_memory(uri):
+    return make_url(uri).database in (None, "", ":memory:")
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database. File SQLite and
+    Postgres get a sized QueuePool; in-memory SQLite keeps SQLAlchemy's
+    single-connection pool, which takes no sizing arguments.
+    """
+    uri = config["SQLALCHEMY_DATABASE_URI"]
+    options = {}
+    if is_sqlite(uri):
+        # sqlite3's own lock wait, in seconds; the pragma below sets the same
+        options["connect_args"] = {"timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}
+        if _is_memory(uri):
+            return options
+    else:
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = config["DB_POOL_RECYCLE"]
+    options.update(
+        pool_size=config["DB_POOL_SIZE"],
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+    )
+    return options
+
+
+def sqlite_pragmas(config):
+    pragmas = {"busy_timeout": config["SQLITE_BUSY_TIMEOUT_MS"]}
+    pragmas.update(config["SQLITE_PRAGMAS"])
+    return pragmas
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def init_app(app):
+    """
+    Configure the engine from app.config and bind the models' db to it.
+    Replaces a bare db.init_app(app).
+    """
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+    db.init_app(app)
+
+    if not is_sqlite(app.config["SQLALCHEMY_DATABASE_URI"]):
+        return
+    pragmas = sqlite_pragmas(app.config)
+    with app.app_context():
+        event.listen(db.engine, "connect", lambda conn, record: apply_pragmas(conn, pragmas))
+
+
+def pragma_report():
+    """Current values of the tuned pragmas, as seen by a pooled connection."""
+    with db.engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")
+        }
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import insert
+
+from counters import unread
+from models import db, Notification
+from tasks import tasks
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class FanoutStats:
+    """
+    Running totals for notification fan-out in this process, logged per
+    batch and exported on /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.last = None
+
+    def record(self, rows, seconds):
+        with self._lock:
+            self.batches += 1
+            self.rows += rows
+            self.seconds += seconds
+            self.last = {
+                "rows": rows,
+                "ms": round(seconds * 1000, 2),
+                "rows_per_sec": round(rows / seconds) if seconds else rows,
+            }
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "seconds": round(self.seconds, 3),
+                "rows_per_sec": round(self.rows / self.seconds) if self.seconds else 0,
+                "last": self.last,
+            }
+
+
+class NotificationFanout:
+    """
+    Writes the same notification to many users with multi-row INSERTs.
+
+    write() inserts inside the caller's transaction; dispatch() queues the
+    fan-out as a background task instead, so the request that caused it
+    only writes one task row.
+    """
+
+    def __init__(self, app=None):
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+        self.stats = FanoutStats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("NOTIFICATION_FANOUT_CHUNK", DEFAULT_CHUNK_SIZE)
+        self.chunk_size = app.config["NOTIFICATION_FANOUT_CHUNK"]
+        app.extensions["notification_fanout"] = self
+
+    def write(self, user_ids, message, commit=True):
+        """
+        Insert one notification per user id, chunk_size rows per statement.
+        Returns the number of rows written.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return 0
+
+        started = time.perf_counter()
+        for i in range(0, len(user_ids), self.chunk_size):
+            rows = [{"user_id": uid, "message": message} for uid in user_ids[i:i + self.chunk_size]]
+            db.session.execute(insert(Notification), rows)
+        # the badges count these rows once they are committed, not before
+        unread.incr_on_commit("notifications", user_ids)
+        if commit:
+            db.session.commit()
+        elapsed = time.perf_counter() - started
+
+        self.stats.record(len(user_ids), elapsed)
+        log.info("notification fan-out: %d rows in %.1f ms", len(user_ids), elapsed * 1000)
+        return len(user_ids)
+
+    def prometheus(self):
+        """This process's fan-out totals, in exposition format."""
+        stats = self.stats.snapshot()
+        return "\n".join([
+            "# HELP skilllink_fanout_batches_total Notification fan-out writes",
+            "# TYPE skilllink_fanout_batches_total counter",
+            f"skilllink_fanout_batches_total {stats['batches']}",
+            "# HELP skilllink_fanout_rows_total Notifications written by fan-out",
+            "# TYPE skilllink_fanout_rows_total counter",
+            f"skilllink_fanout_rows_total {stats['rows']}",
+            "# HELP skilllink_fanout_seconds_total Time spent writing fan-out notifications",
+            "# TYPE skilllink_fanout_seconds_total counter",
+            f"skilllink_fanout_seconds_total {stats['seconds']}",
+        ]) + "\n"
+
+    def dispatch(self, user_ids, message):
+        """
+        Queue the fan-out in the caller's transaction; the rows are written
+        by a task worker once that commits. Returns the number of users.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if user_ids:
+            tasks.enqueue("notify", user_ids=user_ids, message=message)
+        return len(user_ids)
+
+
+@tasks.task("notify")
+def notify_task(user_ids, message):
+    # the task runner's commit marks the task done with these rows, so a
+    # retry can't write them twice
+    fanout.write(user_ids, message, commit=False)
+
+
+fanout = NotificationFanout()
@@ -20,6 +20,7 @@ class RegisterForm(FlaskForm):
     ], validators=[DataRequired()])
 
     skills = TextAreaField("Skills (Only for Workers)")
+    location = StringField("City / Area")
     
     # ✅ Govt ID Image Upload
     govt_id_image = FileField("Upload Govt Approved ID (Photo)")
@@ -0,0 +1,265 @@
+import math
+import re
+
+from sqlalchemy import column, insert, table, text
+
+from models import db, City, Job, User
+
+KM_PER_DEGREE = 111.2
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 200
+
+# name, lat, lon, aliases -- seeded into the city table, which can be extended
+KNOWN_CITIES = [
+    ("Hyderabad", 17.3850, 78.4867, ()),
+    ("Secunderabad", 17.4399, 78.4983, ()),
+    ("Warangal", 17.9689, 79.5941, ()),
+    ("Karimnagar", 18.4386, 79.1288, ()),
+    ("Nizamabad", 18.6725, 78.0941, ()),
+    ("Khammam", 17.2473, 80.1514, ()),
+    ("Visakhapatnam", 17.6868, 83.2185, ("vizag", "vishakhapatnam")),
+    ("Vijayawada", 16.5062, 80.6480, ("bezawada",)),
+    ("Guntur", 16.3067, 80.4365, ()),
+    ("Tirupati", 13.6288, 79.4192, ()),
+    ("Nellore", 14.4426, 79.9865, ()),
+    ("Kurnool", 15.8281, 78.0373, ()),
+    ("Bengaluru", 12.9716, 77.5946, ("bangalore", "bengaluru urban")),
+    ("Mysuru", 12.2958, 76.6394, ("mysore",)),
+    ("Mangaluru", 12.9141, 74.8560, ("mangalore",)),
+    ("Hubballi", 15.3647, 75.1240, ("hubli", "hubli-dharwad")),
+    ("Belagavi", 15.8497, 74.4977, ("belgaum",)),
+    ("Chennai", 13.0827, 80.2707, ("madras",)),
+    ("Coimbatore", 11.0168, 76.9558, ("kovai",)),
+    ("Madurai", 9.9252, 78.1198, ()),
+    ("Tiruchirappalli", 10.7905, 78.7047, ("trichy", "tiruchi")),
+    ("Salem", 11.6643, 78.1460, ()),
+    ("Kochi", 9.9312, 76.2673, ("cochin", "ernakulam")),
+    ("Thiruvananthapuram", 8.5241, 76.9366, ("trivandrum",)),
+    ("Kozhikode", 11.2588, 75.7804, ("calicut",)),
+    ("Mumbai", 19.0760, 72.8777, ("bombay",)),
+    ("Navi Mumbai", 19.0330, 73.0297, ()),
+    ("Thane", 19.2183, 72.9781, ()),
+    ("Pune", 18.5204, 73.8567, ("poona",)),
+    ("Nagpur", 21.1458, 79.0882, ()),
+    ("Nashik", 19.9975, 73.7898, ("nasik",)),
+    ("Aurangabad", 19.8762, 75.3433, ("chhatrapati sambhajinagar",)),
+    ("Panaji", 15.4909, 73.8278, ("panjim", "goa")),
+    ("Ahmedabad", 23.0225, 72.5714, ("amdavad",)),
+    ("Surat", 21.1702, 72.8311, ()),
+    ("Vadodara", 22.3072, 73.1812, ("baroda",)),
+    ("Rajkot", 22.3039, 70.8022, ()),
+    ("Delhi", 28.7041, 77.1025, ("new delhi", "ncr")),
+    ("Noida", 28.5355, 77.3910, ()),
+    ("Gurugram", 28.4595, 77.0266, ("gurgaon",)),
+    ("Ghaziabad", 28.6692, 77.4538, ()),
+    ("Faridabad", 28.4089, 77.3178, ()),
+    ("Chandigarh", 30.7333, 76.7794, ()),
+    ("Ludhiana", 30.9010, 75.8573, ()),
+    ("Amritsar", 31.6340, 74.8723, ()),
+    ("Dehradun", 30.3165, 78.0322, ()),
+    ("Jaipur", 26.9124, 75.7873, ()),
+    ("Jodhpur", 26.2389, 73.0243, ()),
+    ("Udaipur", 24.5854, 73.7125, ()),
+    ("Lucknow", 26.8467, 80.9462, ()),
+    ("Kanpur", 26.4499, 80.3319, ()),
+    ("Agra", 27.1767, 78.0081, ()),
+    ("Varanasi", 25.3176, 82.9739, ("banaras", "benares", "kashi")),
+    ("Prayagraj", 25.4358, 81.8463, ("allahabad",)),
+    ("Bhopal", 23.2599, 77.4126, ()),
+    ("Indore", 22.7196, 75.8577, ()),
+    ("Raipur", 21.2514, 81.6296, ()),
+    ("Patna", 25.5941, 85.1376, ()),
+    ("Ranchi", 23.3441, 85.3096, ()),
+    ("Kolkata", 22.5726, 88.3639, ("calcutta",)),
+    ("Howrah", 22.5958, 88.2636, ()),
+    ("Bhubaneswar", 20.2961, 85.8245, ()),
+    ("Cuttack", 20.4625, 85.8830, ()),
+    ("Guwahati", 26.1445, 91.7362, ()),
+    ("Srinagar", 34.0837, 74.7973, ()),
+]
+
+# R*Tree indexes over job/user coordinates, kept in sync by triggers
+RTREE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {name}_geo USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    """CREATE TRIGGER IF NOT EXISTS {name}_geo_ai AFTER INSERT ON "{name}" WHEN new.lat IS NOT NULL BEGIN
+        INSERT INTO {name}_geo VALUES (new.id, new.lat, new.lat, new.lon, new.lon);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS {name}_geo_ad AFTER DELETE ON "{name}" BEGIN
+        DELETE FROM {name}_geo WHERE id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS {name}_geo_au AFTER UPDATE OF lat, lon ON "{name}" BEGIN
+        DELETE FROM {name}_geo WHERE id = old.id;
+        INSERT INTO {name}_geo SELECT new.id, new.lat, new.lat, new.lon, new.lon WHERE new.lat IS NOT NULL;
+    END""",
+]
+INDEXED = {Job: "job", User: "user"}
+
+_rtree_enabled = None
+_cities = None
+
+
+def rtree_enabled():
+    """Whether the R*Tree indexes exist; looked up once per process unless install() ran."""
+    global _rtree_enabled
+    if _rtree_enabled is None:
+        _rtree_enabled = db.engine.dialect.name == "sqlite" and db.session.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE name IN ('job_geo', 'user_geo')"
+        )).scalar() == 2
+    return _rtree_enabled
+
+
+def install():
+    """
+    Seed the city table and create the R*Tree indexes and triggers,
+    filling each index the first time. Radius search falls back to a
+    lat/lon B-tree range if the database isn't SQLite or lacks R*Tree.
+    """
+    global _rtree_enabled, _cities
+    _cities = None
+    rows = [
+        {"key": key, "name": name, "lat": lat, "lon": lon}
+        for name, lat, lon, aliases in KNOWN_CITIES
+        for key in (normalize(name),) + aliases
+    ]
+    existing = {key for (key,) in db.session.query(City.key)}
+    missing = [row for row in rows if row["key"] not in existing]
+    if missing:
+        db.session.execute(insert(City), missing)
+        db.session.commit()
+
+    if db.engine.dialect.name != "sqlite":
+        _rtree_enabled = False
+        return False
+
+    with db.engine.begin() as conn:
+        existing = {
+            row[0] for row in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE name IN ('job_geo', 'user_geo')")
+            )
+        }
+        try:
+            for name in INDEXED.values():
+                for ddl in RTREE_SCHEMA:
+                    conn.execute(text(ddl.format(name=name)))
+        except Exception:
+            _rtree_enabled = False
+            return False
+        for name in INDEXED.values():
+            if f"{name}_geo" not in existing:
+                conn.execute(text(
+                    f'INSERT INTO {name}_geo SELECT id, lat, lat, lon, lon FROM "{name}" WHERE lat IS NOT NULL'
+                ))
+
+    _rtree_enabled = True
+    return True
+
+
+# ----------- GEOCODING -----------
+
+def normalize(place):
+    return " ".join(re.findall(r"[a-z]+", (place or "").lower()))
+
+
+def cities():
+    global _cities
+    if _cities is None:
+        _cities = {key: (name, lat, lon) for key, name, lat, lon in
+                   db.session.query(City.key, City.name, City.lat, City.lon)}
+    return _cities
+
+
+def geocode(place):
+    """
+    (city, lat, lon) for free text like "Madhapur, Hyderabad" or "vizag",
+    from the offline city table; None if no part of it names a known city.
+    """
+    known = cities()
+    whole = normalize(place)
+    if whole in known:
+        return known[whole]
+    # addresses end with the city (and maybe state / pin): try parts right to left
+    for part in reversed(re.split(r"[,/\n]", place or "")):
+        key = normalize(part)
+        if key in known:
+            return known[key]
+    words = whole.split()
+    for size in (3, 2, 1):
+        for i in range(len(words) - size, -1, -1):
+            key = " ".join(words[i:i + size])
+            if key in known:
+                return known[key]
+    return None
+
+
+def locate(obj):
+    """Set obj.city/lat/lon from obj.location; returns whether it was found."""
+    hit = geocode(obj.location) if obj.location else None
+    obj.city, obj.lat, obj.lon = hit if hit else (None, None, None)
+    return hit is not None
+
+
+def backfill():
+    """Geocode every job and user that has a location but no coordinates."""
+    count = 0
+    for model in (Job, User):
+        rows = db.session.query(model.id, model.location).filter(
+            model.location.isnot(None), model.lat.is_(None)
+        ).all()
+        updates = []
+        for row_id, location in rows:
+            hit = geocode(location)
+            if hit:
+                updates.append({"id": row_id, "city": hit[0], "lat": hit[1], "lon": hit[2]})
+        if updates:
+            db.session.execute(db.update(model), updates)
+        count += len(updates)
+    db.session.commit()
+    return count
+
+
+# ----------- RADIUS SEARCH -----------
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance (haversine)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def within(query, model, point, km):
+    """
+    Narrow `query` over Job or User to rows within `km` of point=(lat, lon).
+    Returns (query, distance) where distance is an SQL expression ordering
+    rows nearest first.
+
+    The bounding box is searched through the R*Tree (or the lat/lon index);
+    the exact cut uses an equirectangular distance, which is plain
+    arithmetic any database can evaluate and within 0.5% of great-circle
+    distance at city scale.
+    """
+    lat, lon = point
+    km = min(km, MAX_RADIUS_KM)
+    dlat = km / KM_PER_DEGREE
+    scale = max(math.cos(math.radians(lat)), 0.01)
+    dlon = dlat / scale
+
+    if rtree_enabled():
+        geo = table(f"{INDEXED[model]}_geo", column("id"), column("min_lat"), column("max_lat"),
+                    column("min_lon"), column("max_lon"))
+        query = query.join(geo, geo.c.id == model.id).filter(
+            geo.c.max_lat >= lat - dlat, geo.c.min_lat <= lat + dlat,
+            geo.c.max_lon >= lon - dlon, geo.c.min_lon <= lon + dlon,
+        )
+    else:
+        query = query.filter(model.lat.between(lat - dlat, lat + dlat), model.lon.between(lon - dlon, lon + dlon))
+
+    y = model.lat - lat
+    x = (model.lon - lon) * scale
+    distance = y * y + x * x
+    return query.filter(distance <= dlat * dlat), distance
+
+
+def radius_arg(args):
+    """?radius=<km> from a request, clamped; DEFAULT_RADIUS_KM when absent."""
+    km = args.get("radius", DEFAULT_RADIUS_KM, type=float)
+    return max(1, min(km, MAX_RADIUS_KM))
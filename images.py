@@ -0,0 +1,144 @@
+import hashlib
+import logging
+import os
+import tempfile
+
+from flask import current_app, url_for
+from werkzeug.utils import secure_filename
+
+from tasks import tasks
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # thumbnails are skipped; pages fall back to the original
+    Image = None
+
+log = logging.getLogger(__name__)
+
+THUMB_SIZES = (64, 256)
+THUMB_DIR = "thumbs"
+CHUNK_SIZE = 64 * 1024
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
+
+
+def _extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ""))[1].lower()
+    return ext if ext in ALLOWED_EXTENSIONS else ".img"
+
+
+def store_upload(file, folder):
+    """
+    Stream an uploaded FileStorage into `folder` under a content-hash name
+    and return that name. Identical uploads map to the same file, so a
+    re-upload costs no disk and the URL never changes for given bytes.
+    """
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+        filename = digest.hexdigest()[:32] + _extension(file.filename)
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filename
+
+
+def thumb_name(filename, size):
+    return f"{os.path.splitext(filename)[0]}-{size}.webp"
+
+
+def make_thumbnails(folder, filename, sizes=THUMB_SIZES):
+    """Write a WebP of each size next to the original; returns paths written."""
+    if Image is None:
+        return []
+    thumb_dir = os.path.join(folder, THUMB_DIR)
+    os.makedirs(thumb_dir, exist_ok=True)
+    written = []
+    with Image.open(os.path.join(folder, filename)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for size in sizes:
+            path = os.path.join(thumb_dir, thumb_name(filename, size))
+            if os.path.exists(path):
+                continue
+            thumb = image.copy()
+            thumb.thumbnail((size, size))
+            # unique temp name: the same upload may be processed twice at once
+            fd, tmp_path = tempfile.mkstemp(dir=thumb_dir, prefix=".thumb-")
+            with os.fdopen(fd, "wb") as out:
+                thumb.save(out, "WEBP", quality=80, method=4)
+            os.replace(tmp_path, path)
+            written.append(path)
+    return written
+
+
+def backfill_thumbnails(folder):
+    """Thumbnail every image already in `folder`; returns how many were made."""
+    if Image is None or not os.path.isdir(folder):
+        return 0
+    count = 0
+    for name in os.listdir(folder):
+        if os.path.splitext(name)[1].lower() not in ALLOWED_EXTENSIONS:
+            continue
+        try:
+            count += bool(make_thumbnails(folder, name))
+        except OSError as exc:
+            log.warning("skipping %s: %s", name, exc)
+    return count
+
+
+class ImagePipeline:
+    """
+    Saves uploads synchronously (a streamed copy, no decoding) and leaves
+    resizing to a background task so the request doesn't wait on Pillow.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["image_pipeline"] = self
+        app.add_template_global(thumbnail_url)
+
+    def save(self, file, folder):
+        """Store the upload and queue its thumbnails; returns the filename."""
+        filename = store_upload(file, folder)
+        self.submit(folder, filename)
+        return filename
+
+    def submit(self, folder, filename):
+        """Queue thumbnails in the current transaction (written once it commits)."""
+        if Image is None:
+            return None
+        return tasks.enqueue("images.thumbnails", folder=folder, filename=filename)
+
+
+@tasks.task("images.thumbnails")
+def thumbnails_task(folder, filename):
+    make_thumbnails(folder, filename)
+
+
+def thumbnail_url(subdir, filename, size):
+    """
+    Static URL of the `size` thumbnail of static/<subdir>/<filename>, or of
+    the original while the thumbnail doesn't exist (yet).
+    """
+    thumb = f"{subdir}/{THUMB_DIR}/{thumb_name(filename, size)}"
+    if os.path.exists(os.path.join(current_app.static_folder, thumb)):
+        return url_for("static", filename=thumb)
+    return url_for("static", filename=f"{subdir}/{filename}")
+
+
+images = ImagePipeline()
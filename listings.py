@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from flask import render_template, request
+from markupsafe import Markup
+
+from cache import response_cache, WORKER_LISTINGS
+from models import db, User
+from pagination import Page, page_json, wants_json
+from serializers import user_json
+from skills import skill_index
+from tasks import tasks
+
+
+def cached_listing(template, load, key=(), **context):
+    """
+    Rendered worker grid (or its JSON page) for this URL, from the response
+    cache while no worker listing has changed. `load` returns a Page or a
+    plain list and only runs on a miss; `key` adds anything else the
+    output depends on.
+    """
+    as_json = wants_json()
+
+    def render():
+        page = load()
+        if isinstance(page, list):
+            page = Page(page)
+        if as_json:
+            return page_json(page, user_json)
+        return render_template(template, workers=page.items, next_cursor=page.next_cursor, **context)
+
+    value = response_cache.get_or_set(
+        (WORKER_LISTINGS,), (request.endpoint, request.full_path, as_json, tuple(key)), render
+    )
+    return value if as_json else Markup(value)
+
+
+def workers_changed(user_id=None):
+    """An approved worker was added, removed or edited."""
+    skill_index.invalidate()
+    response_cache.bump(WORKER_LISTINGS)
+    if user_id is not None:
+        # seen by every process's recommender, not just this one's cache version
+        User.query.filter_by(id=user_id).update({User.worker_changed_at: datetime.utcnow()},
+                                                synchronize_session=False)
+        tasks.enqueue("recommend.worker", worker_id=user_id)
+        db.session.commit()
@@ -0,0 +1,188 @@
+"""
+Chat between users, and notifications.
+"""
+import json
+import time
+
+from flask import Blueprint, Response, abort, current_app, jsonify, redirect, render_template, request, stream_with_context, url_for
+from flask_login import current_user, login_required
+
+import pubsub
+from counters import unread
+from models import db, Conversation, Message, Notification, User
+from pagination import keyset_page, page_args, page_json, stamp_page, wants_json, MAX_LIMIT
+from serializers import message_json, notification_json, user_json
+from utils import mark_all_notifications_read, mark_notification_read as mark_read
+from utils import inbox_query, mark_thread_read, record_message, thread_query
+
+messaging = Blueprint("messaging", __name__)
+
+
+@messaging.app_context_processor
+def inject_unread_counts():
+    # navbar badges: served from the counter cache, not a COUNT per page
+    if not current_user.is_authenticated:
+        return {}
+    return {
+        "unread_notifications": unread.get("notifications", current_user.id),
+        "unread_messages": unread.get("messages", current_user.id),
+    }
+
+
+# ----------- CHAT -----------
+@messaging.route('/chat/<int:user_id>', methods=['GET','POST'])
+@login_required
+def chat(user_id):
+    other = User.query.get(user_id)
+
+    if request.method == "POST":
+        new_msg = record_message(current_user.id, user_id, request.form['message'])
+        db.session.commit()
+        unread.incr("messages", [user_id])
+
+        # ✅ push the one new row to both sides' open streams
+        payload = message_json(new_msg)
+        pubsub.get_broker().publish(pubsub.chat_channel(current_user.id, user_id), payload)
+        if wants_json():
+            return jsonify(payload)
+        return redirect(url_for('messaging.chat', user_id=user_id))  # ✅ FIXED
+
+    # opening the thread reads everything the other side sent
+    mark_thread_read(current_user.id, user_id)
+
+    # newest page first; the cursor walks back to older messages
+    cursor, limit = page_args()
+    page = keyset_page(thread_query(current_user.id, user_id), Message.id, cursor, limit)
+    if wants_json():
+        return jsonify(page_json(page, message_json))
+
+    return render_template("chat.html", other=other, messages=page.items[::-1], next_cursor=page.next_cursor,
+                           live=cursor is None, sse=current_app.config['CHAT_SSE'])
+
+
+@messaging.route('/conversation/<int:conversation_id>')
+@login_required
+def conversation(conversation_id):
+    conv = Conversation.query.get_or_404(conversation_id)
+    if current_user.id not in (conv.user_low_id, conv.user_high_id):
+        return redirect(url_for('messaging.chats'))
+    return redirect(url_for('messaging.chat', user_id=conv.partner_id(current_user.id)))
+
+
+@messaging.route('/chat/<int:user_id>/messages')
+@login_required
+def chat_messages(user_id):
+    """Messages in the thread newer than ?since=<id>, oldest first."""
+    since = request.args.get('since', 0, type=int)
+    messages = (
+        thread_query(current_user.id, user_id)
+        .filter(Message.id > since)
+        .order_by(Message.id)
+        .limit(MAX_LIMIT)
+        .all()
+    )
+    mark_thread_read(current_user.id, user_id)
+    return jsonify({"items": [message_json(m) for m in messages]})
+
+
+@messaging.route('/chat/<int:user_id>/stream')
+@login_required
+def chat_stream(user_id):
+    """
+    Server-sent events for one conversation. Each event is a single new
+    message; Last-Event-ID (or ?since=) resumes after a reconnect. Only
+    with CHAT_SSE on: a sync worker would be tied up for the whole stream.
+    """
+    if not current_app.config['CHAT_SSE']:
+        abort(404)
+    me = current_user.id
+    last_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('since', 0, type=int)
+    sub = pubsub.get_broker().subscribe(pubsub.chat_channel(me, user_id))
+    stream_seconds = current_app.config['CHAT_STREAM_SECONDS']
+    poll_seconds = current_app.config['CHAT_POLL_SECONDS']
+
+    def catch_up(after):
+        rows = thread_query(me, user_id).filter(Message.id > after).order_by(Message.id).limit(MAX_LIMIT).all()
+        payloads = [message_json(m) for m in rows]
+        db.session.close()   # don't pin a pooled connection while idle
+        return payloads
+
+    def events(last_id):
+        deadline = time.monotonic() + stream_seconds
+        pending = catch_up(last_id)
+        try:
+            while True:
+                fresh = [p for p in pending if p["id"] > last_id]
+                for payload in fresh:
+                    last_id = payload["id"]
+                    yield f"id: {last_id}\nevent: message\ndata: {json.dumps(payload)}\n\n"
+                if any(p["sender_id"] == user_id for p in fresh):
+                    mark_thread_read(me, user_id)
+                    db.session.close()
+
+                if time.monotonic() >= deadline:
+                    return
+                payload = sub.get(timeout=poll_seconds)
+                if payload is not None:
+                    pending = [payload]
+                else:
+                    pending = catch_up(last_id)
+                    if not pending:
+                        yield ": keepalive\n\n"
+        finally:
+            sub.close()
+
+    return Response(
+        stream_with_context(events(last_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+@messaging.route('/chats')
+@login_required
+def chats():
+    cursor, limit = page_args()
+    page = stamp_page(inbox_query(current_user.id), Conversation.last_activity, Conversation.id, cursor, limit,
+                      key=lambda row: (row[0].last_activity, row[0].id))
+    if wants_json():
+        return jsonify({
+            "items": [
+                {
+                    "conversation_id": conv.id,
+                    "partner": user_json(partner),
+                    "last_message": message_json(conv.last_message) if conv.last_message else None,
+                    "unread": conv.unread_for(current_user.id),
+                }
+                for conv, partner in page.items
+            ],
+            "next_cursor": page.next_cursor,
+        })
+    return render_template('chats.html', conversations=page.items, next_cursor=page.next_cursor)
+
+
+# ----------- NOTIFICATIONS -----------
+@messaging.route('/notifications')
+@login_required
+def notifications():
+    cursor, limit = page_args()
+    page = keyset_page(Notification.query.filter_by(user_id=current_user.id), Notification.id, cursor, limit)
+    if wants_json():
+        return jsonify(page_json(page, notification_json))
+    return render_template('notifications.html', notifications=page.items, next_cursor=page.next_cursor)
+
+@messaging.route('/notification/read/<int:notification_id>')
+@login_required
+def mark_notification_read(notification_id):
+    note = Notification.query.get(notification_id)
+    if note and note.user_id == current_user.id:
+        mark_read(note)
+    return redirect(url_for('messaging.notifications'))
+
+
+@messaging.route('/notifications/read_all')
+@login_required
+def mark_all_read():
+    mark_all_notifications_read(current_user.id)
+    if wants_json():
+        return jsonify({"ok": True})
+    return redirect(url_for('messaging.notifications'))
@@ -0,0 +1,222 @@
+from datetime import datetime
+
+from sqlalchemy import inspect, or_, text
+
+import geo
+import search
+from models import db, User
+from passwords import hash_password
+from skills import rebuild_user_skills
+from utils import backfill_conversations, recompute_rating_aggregates
+
+
+def _default_sql(column):
+    default = column.server_default
+    if default is None:
+        return ""
+    arg = default.arg
+    return f" DEFAULT {arg.text if hasattr(arg, 'text') else repr(arg)}"
+
+
+def add_missing_columns():
+    """
+    ALTER TABLE ADD COLUMN for every model column that an existing
+    database.db doesn't have yet. Returns the list of (table, column) added.
+    """
+    insp = inspect(db.engine)
+    added = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = 'ALTER TABLE "{}" ADD COLUMN "{}" {}{}'.format(
+                    table.name, column.name, column.type.compile(db.engine.dialect), _default_sql(column)
+                )
+                conn.execute(text(ddl))
+                added.append((table.name, column.name))
+    return added
+
+
+def add_missing_indexes():
+    """
+    CREATE INDEX for model indexes an existing database.db doesn't have;
+    create_all() skips tables that already exist, indexes included.
+    """
+    insp = inspect(db.engine)
+    added = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {ix["name"] for ix in insp.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    added.append(index.name)
+    return added
+
+
+# indexes replaced by wider ones in models.py
+OBSOLETE_INDEXES = ("ix_message_sender_receiver", "ix_message_receiver_sender")
+
+
+def drop_obsolete_indexes():
+    with db.engine.begin() as conn:
+        for name in OBSOLETE_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def backfill_updated_at():
+    """Start updated_at at the creation time for rows that predate it."""
+    with db.engine.begin() as conn:
+        conn.execute(text("UPDATE job SET updated_at = created_at WHERE updated_at IS NULL"))
+        conn.execute(text("UPDATE application SET updated_at = timestamp WHERE updated_at IS NULL"))
+
+
+def backfill_reviewed_at():
+    """Approved accounts that predate reviewed_at were reviewed already."""
+    User.query.filter(
+        User.reviewed_at.is_(None), or_(User.is_approved == db.true(), User.role == 'admin')
+    ).update({User.reviewed_at: datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+
+
+def upgrade():
+    """
+    Bring the schema up to date: create new tables, add new columns and
+    backfill any derived data those columns need.
+    """
+    insp = inspect(db.engine)
+    had_skill_tags = insp.has_table("user_skill")
+    had_conversations = insp.has_table("conversation")
+    had_matches = insp.has_table("job_match")
+    had_rollups = insp.has_table("daily_stat")
+
+    db.create_all()
+    added = add_missing_columns()
+    add_missing_indexes()
+    drop_obsolete_indexes()
+    search.install()
+    geo.install()
+
+    if ("user", "ratings_sum") in added or ("user", "ratings_count") in added:
+        recompute_rating_aggregates()
+    if not had_skill_tags:
+        rebuild_user_skills()
+    if not had_conversations:
+        backfill_conversations()
+    if ("job", "updated_at") in added or ("application", "updated_at") in added:
+        backfill_updated_at()
+    if ("user", "reviewed_at") in added:
+        backfill_reviewed_at()
+    if ("job", "lat") in added or ("user", "lat") in added:
+        geo.backfill()
+    if not had_matches:
+        from recommend import recommender
+        recommender.rebuild()
+    if not had_rollups:
+        import rollups
+        rollups.rebuild()
+    return added
+
+
+def seed_admin():
+    """Create the default admin account on an empty database."""
+    if User.query.filter_by(role="admin").first():
+        return None
+    admin = User(
+        role="admin", name="Admin", email="admin@skill.com",
+        password=hash_password("admin123"),
+        aadhar="000000000000",
+        is_approved=True
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return admin
+
+
+def init_db():
+    """
+    Everything a deploy runs once before starting web workers (`flask
+    init-db`): upgrade the schema, seed the admin, queue retention. Workers
+    themselves never touch the schema, so they start without a DDL pass or
+    racing each other's backfills.
+    """
+    from retention import retention
+    added = upgrade()
+    seed_admin()
+    retention.schedule()
+    return added
+
+
+def hot_queries():
+    """
+    The filtering queries the busiest routes issue, keyed by route, for
+    checking their plans against the indexes above.
+    """
+    from models import Application, DailyStat, Hire, Job, JobMatch, Message, Notification, Rating, Task, User
+    from retention import finished_tasks
+    from utils import inbox_query, thread_query
+
+    me, other = 1, 2
+    return {
+        "client_dashboard unread count": db.session.query(db.func.count(Notification.id))
+            .filter(Notification.user_id == me, Notification.is_read == db.false()),
+        "notifications": Notification.query.filter_by(user_id=me).order_by(Notification.id.desc()).limit(21),
+        "client_dashboard jobs": Job.query.filter_by(client_id=me),
+        "client_dashboard hires": Hire.query.filter_by(client_id=me, status='hired'),
+        "hire_select_job": Job.query.filter_by(client_id=me, is_open=True),
+        "find_jobs": Job.query.filter(Job.is_open == True).order_by(Job.id.desc()).limit(21),
+        "open jobs newest": Job.query.filter(Job.is_open == True).order_by(Job.created_at.desc()).limit(21),
+        "find_jobs applied ids": db.session.query(Application.job_id)
+            .filter(Application.worker_id == me, Application.job_id.in_([1, 2, 3])),
+        "apply_job duplicate check": Application.query.filter_by(job_id=1, worker_id=me),
+        "view_applications": Application.query.filter_by(client_id=me).order_by(Application.id.desc()).limit(21),
+        "chat": thread_query(me, other).order_by(Message.id.desc()).limit(21),
+        "messages sent between": Message.query.filter_by(sender_id=me, receiver_id=other)
+            .order_by(Message.timestamp.desc()).limit(21),
+        "chats": inbox_query(me),
+        "navbar unread messages": db.session.query(db.func.count(Message.id))
+            .filter(Message.receiver_id == me, Message.is_read == db.false()),
+        "rate_user existing": Rating.query.filter_by(recipient_id=other, author_id=me, job_id=1),
+        "profile_view reviews": Rating.query.filter_by(recipient_id=other).order_by(Rating.created_at.desc()),
+        "worker_dashboard recommended jobs": JobMatch.query.filter_by(worker_id=me)
+            .order_by(JobMatch.score.desc()).limit(5),
+        "hire_select_job recommended workers": JobMatch.query.filter(JobMatch.job_id.in_([1, 2, 3])),
+        "find_jobs near": geo.within(Job.query.filter(Job.is_open == True), Job, (17.4, 78.5), 10)[0],
+        "find_workers near": geo.within(User.query.filter_by(role='worker', is_approved=True), User, (17.4, 78.5), 10)[0],
+        "task claim": Task.query.filter(Task.status == "pending", Task.run_at <= db.func.now())
+            .order_by(Task.run_at).limit(1),
+        "admin_moderation": User.query.filter(User.reviewed_at.is_(None), User.role != 'admin')
+            .order_by(User.id).limit(51),
+        "admin_dashboard rollups": DailyStat.query.filter(DailyStat.metric == "hires",
+                                                          DailyStat.day.between("2024-01-01", "2024-01-30")),
+        "retention finished tasks": finished_tasks("done", db.func.now()).limit(500),
+        "workers": User.query.filter_by(role='worker', is_approved=True).order_by(User.id).limit(21),
+    }
+
+
+def explain(query):
+    """EXPLAIN QUERY PLAN detail lines for an ORM query (SQLite only)."""
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    args = [params[name] for name in compiled.positiontup]
+    result = db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), tuple(args))
+    return [row[-1] for row in result]
+
+
+def check_query_plans():
+    """
+    Return {route: plan} for every hot query whose plan still scans a
+    whole table instead of searching an index.
+    """
+    scans = {}
+    for name, query in hot_queries().items():
+        plan = explain(query)
+        if any(line.startswith("SCAN ") and "INDEX" not in line for line in plan):
+            scans[name] = plan
+    return scans
@@ -1,7 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, verify_password
 
 db = SQLAlchemy()   # ✅ Correct place — no import from app
 
@@ -9,6 +9,12 @@ db = SQLAlchemy()   # ✅ Correct place — no import from app
 
 class User(db.Model, UserMixin):
     __tablename__ = 'user'
+    __table_args__ = (
+        db.Index('ix_user_role_approved', 'role', 'is_approved'),
+        db.Index('ix_user_lat_lon', 'lat', 'lon'),
+        db.Index('ix_user_reviewed_at', 'reviewed_at'),
+        db.Index('ix_user_role_worker_changed', 'role', 'worker_changed_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     role = db.Column(db.String(20), nullable=False)  # client / worker / admin
     name = db.Column(db.String(100), nullable=False)
@@ -17,11 +23,27 @@ class User(db.Model, UserMixin):
     aadhar = db.Column(db.String(20), nullable=False)
     skills = db.Column(db.Text)
     is_approved = db.Column(db.Boolean, default=False)
+    # when an admin approved or rejected the account; NULL while awaiting review
+    reviewed_at = db.Column(db.DateTime, nullable=True)
+    # last skills edit, approval or rejection; versions the recommender's corpus
+    worker_changed_at = db.Column(db.DateTime, nullable=True)
+    # NULL for accounts created before signups were timestamped
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     bio = db.Column(db.Text, default="")
     profile_image = db.Column(db.String(200), default="default.png")
     phone = db.Column(db.String(30), nullable=True)
     govt_id_image = db.Column(db.String(255), nullable=True)
 
+    # free-text location as entered, and where geo.locate() placed it
+    location = db.Column(db.String(200), nullable=True)
+    city = db.Column(db.String(100), nullable=True)
+    lat = db.Column(db.Float, nullable=True)
+    lon = db.Column(db.Float, nullable=True)
+
+    # denormalized rating aggregates, maintained by utils.record_rating
+    ratings_sum = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    ratings_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     # relationships
     # ratings where this user is the receiver (worker/client)
     ratings_received = db.relationship("Rating", backref="recipient", foreign_keys="Rating.recipient_id", lazy="dynamic")
@@ -29,60 +51,100 @@ class User(db.Model, UserMixin):
 
     def avg_rating(self):
         """Return float average (rounded to 1 decimal) or None"""
-        rows = self.ratings_received.all()
-        if not rows:
+        if not self.ratings_count:
             return None
-        total = sum(r.score for r in rows)
-        avg = total / len(rows)
-        return round(avg, 1)
+        return round(self.ratings_sum / self.ratings_count, 1)
 
     def rating_count(self):
-        return self.ratings_received.count()
+        return self.ratings_count or 0
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+
+
+class Skill(db.Model):
+    __tablename__ = 'skill'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # normalized, lower-case
+
+
+class UserSkill(db.Model):
+    __tablename__ = 'user_skill'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skill.id'), primary_key=True, index=True)
 
 
 class Hire(db.Model):
+    __table_args__ = (
+        db.Index('ix_hire_client_status', 'client_id', 'status'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     worker_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     job_id = db.Column(db.Integer, db.ForeignKey('job.id'))
     status = db.Column(db.String(20), default="pending")
 
-    client = db.relationship("User", foreign_keys=[client_id])
-    worker = db.relationship("User", foreign_keys=[worker_id])
-    job = db.relationship("Job", foreign_keys=[job_id])
+    # many-to-one: lazy per row by default, eager-loaded by the list queries that render them
+    client = db.relationship("User", foreign_keys=[client_id], lazy="select")
+    worker = db.relationship("User", foreign_keys=[worker_id], lazy="select")
+    job = db.relationship("Job", foreign_keys=[job_id], lazy="select")
 
 
 class Job(db.Model):
+    __table_args__ = (
+        db.Index('ix_job_is_open', 'is_open'),                      # newest by id (find_jobs)
+        db.Index('ix_job_open_created', 'is_open', 'created_at'),  # newest by created_at
+        db.Index('ix_job_client_open', 'client_id', 'is_open'),
+        db.Index('ix_job_lat_lon', 'lat', 'lon'),
+        db.Index('ix_job_updated_at', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     location = db.Column(db.String(200), nullable=True)  # ✅ Add this
+    city = db.Column(db.String(100), nullable=True)
+    lat = db.Column(db.Float, nullable=True)
+    lon = db.Column(db.Float, nullable=True)
     client_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    client = db.relationship("User", backref=db.backref("jobs_posted", lazy='dynamic'), foreign_keys=[client_id])
+    client = db.relationship("User", backref=db.backref("jobs_posted", lazy='dynamic'), foreign_keys=[client_id],
+                             lazy="select")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_open = db.Column(db.Boolean, default=True)
+    # bumped on every change; drives the API's Last-Modified and ?since= deltas
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Application(db.Model):
+    __table_args__ = (
+        db.Index('ix_application_worker_job', 'worker_id', 'job_id'),
+        db.Index('ix_application_client', 'client_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
     worker_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     client_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # ✅ Add this
     status = db.Column(db.String(20), default='applied')
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    worker = db.relationship("User", foreign_keys=[worker_id])
-    client = db.relationship("User", foreign_keys=[client_id])
-    job = db.relationship("Job", foreign_keys=[job_id])
+    # see Hire: eager-loaded by view_applications
+    worker = db.relationship("User", foreign_keys=[worker_id], lazy="select")
+    client = db.relationship("User", foreign_keys=[client_id], lazy="select")
+    job = db.relationship("Job", foreign_keys=[job_id], lazy="select")
 
 
 class Message(db.Model):
     __tablename__ = 'message'
+    __table_args__ = (
+        db.Index('ix_message_sender_receiver_time', 'sender_id', 'receiver_id', 'timestamp'),
+        db.Index('ix_message_receiver_sender_time', 'receiver_id', 'sender_id', 'timestamp'),
+        db.Index('ix_message_unread', 'receiver_id',
+                 sqlite_where=db.text('is_read = 0'), postgresql_where=db.text('is_read = false')),
+        db.Index('ix_message_conversation', 'conversation_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), nullable=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -90,8 +152,77 @@ class Message(db.Model):
     is_read = db.Column(db.Boolean, default=False)
 
 
+class MessageArchive(db.Model):
+    """Messages moved out of `message` by the retention policy (retention.py)."""
+    __tablename__ = 'message_archive'
+    __table_args__ = (
+        db.Index('ix_message_archive_conversation', 'conversation_id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)   # the id it had in message
+    conversation_id = db.Column(db.Integer, nullable=True)
+    sender_id = db.Column(db.Integer, nullable=False)
+    receiver_id = db.Column(db.Integer, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime)
+    is_read = db.Column(db.Boolean)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Conversation(db.Model):
+    """
+    One row per pair of users (low id first), updated on every send so the
+    inbox never has to scan Message.
+    """
+    __tablename__ = 'conversation'
+    __table_args__ = (
+        db.UniqueConstraint('user_low_id', 'user_high_id', name='uq_conversation_pair'),
+        db.Index('ix_conversation_high', 'user_high_id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_low_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_high_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_activity = db.Column(db.DateTime, default=datetime.utcnow)
+    unread_low = db.Column(db.Integer, nullable=False, default=0, server_default="0")   # unread by user_low
+    unread_high = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # unread by user_high
+
+    last_message = db.relationship(
+        "Message", primaryjoin="foreign(Conversation.last_message_id) == Message.id", viewonly=True
+    )
+
+    @staticmethod
+    def pair(user_a, user_b):
+        return tuple(sorted((user_a, user_b)))
+
+    def partner_id(self, user_id):
+        return self.user_high_id if user_id == self.user_low_id else self.user_low_id
+
+    def unread_for(self, user_id):
+        return self.unread_low if user_id == self.user_low_id else self.unread_high
+
+
+class JobMatch(db.Model):
+    """
+    Precomputed job/worker similarity (recommend.py): each open job's top
+    workers plus each approved worker's top jobs, so either side's list is
+    one ordered index range scan.
+    """
+    __tablename__ = 'job_match'
+    __table_args__ = (
+        db.Index('ix_job_match_worker_score', 'worker_id', 'score'),
+        db.Index('ix_job_match_job_score', 'job_id', 'score'),
+    )
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), primary_key=True)
+    worker_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+
+
 class Rating(db.Model):
     __tablename__ = 'rating'
+    __table_args__ = (
+        db.Index('ix_rating_recipient_author_job', 'recipient_id', 'author_id', 'job_id'),
+        db.Index('ix_rating_recipient_created', 'recipient_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # who receives the rating
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)     # who gave the rating
@@ -102,8 +233,59 @@ class Rating(db.Model):
 
 class Notification(db.Model):
     __tablename__ = 'notification'
+    __table_args__ = (
+        db.Index('ix_notification_user', 'user_id'),
+        # partial: only unread rows, so badge counts never touch read history
+        db.Index('ix_notification_unread', 'user_id',
+                 sqlite_where=db.text('is_read = 0'), postgresql_where=db.text('is_read = false')),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     message = db.Column(db.String(255), nullable=False)
     is_read = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class DailyStat(db.Model):
+    """
+    One day's counter for an analytics metric (rollups.py), optionally
+    broken down by `key`; `total` carries a sum alongside the count, such
+    as the rating scores.
+    """
+    __tablename__ = 'daily_stat'
+    metric = db.Column(db.String(40), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    key = db.Column(db.String(100), primary_key=True, default="")
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class City(db.Model):
+    """Offline gazetteer: normalized place name (or alias) -> city and coordinates."""
+    __tablename__ = 'city'
+    key = db.Column(db.String(100), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    lat = db.Column(db.Float, nullable=False)
+    lon = db.Column(db.Float, nullable=False)
+
+
+class Task(db.Model):
+    """
+    Durable background task (tasks.py). Written in the same transaction as
+    the change that needs it, so either both happen or neither does.
+    """
+    __tablename__ = 'task'
+    __table_args__ = (
+        db.Index('ix_task_status_run_at', 'status', 'run_at'),
+        db.Index('ix_task_status_finished_at', 'status', 'finished_at'),  # retention purge
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}")
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending / running / done / failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
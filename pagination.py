@@ -0,0 +1,151 @@
+import base64
+import binascii
+import bisect
+import json
+from datetime import datetime
+
+from flask import request, url_for
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class Page:
+    """One page of rows plus the opaque cursor for the next one."""
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(**payload):
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_index(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def decode_cursor(token):
+    """
+    Return the cursor payload, or {} for a missing or tampered cursor;
+    "o" (offset) and "k" (key), when present, are non-negative ints.
+    """
+    if not token:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return {}
+    if not isinstance(payload, dict):
+        return {}
+    if any(name in payload and not _is_index(payload[name]) for name in ("o", "k")):
+        return {}
+    return payload
+
+
+def page_args():
+    """Read ?cursor=&limit= from the request, clamping limit."""
+    limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+    return request.args.get("cursor"), max(1, min(limit, MAX_LIMIT))
+
+
+def keyset_page(query, column, cursor=None, limit=DEFAULT_LIMIT, descending=True, key=None):
+    """
+    Seek past the last row of the previous page on an indexed, monotonic
+    column (the primary key, which follows created_at order here), so the
+    cost of a page doesn't grow with how deep the client has scrolled.
+    `key` extracts the column value from a row when the query returns tuples.
+    """
+    after = decode_cursor(cursor).get("k")
+    if after is not None:
+        query = query.filter(column < after if descending else column > after)
+    query = query.order_by(None).order_by(column.desc() if descending else column.asc())
+
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(k=key(last) if key else getattr(last, column.key))
+    return Page(items, next_cursor)
+
+
+def stamp_page(query, stamp_column, id_column, cursor=None, limit=DEFAULT_LIMIT, key=None):
+    """
+    Newest first on a timestamp that changes as rows are touched (e.g. a
+    conversation's last activity), seeking past (stamp, id) of the previous
+    page's last row: ties on the stamp are broken by id, and a row bumped
+    to the top meanwhile is not shown twice. `key` returns (stamp, id) from
+    a row when the query returns tuples.
+    """
+    payload = decode_cursor(cursor)
+    try:
+        after = datetime.fromisoformat(payload["t"]), payload["k"]
+    except (KeyError, TypeError, ValueError):
+        after = None
+    if after is not None:
+        stamp, row_id = after
+        query = query.filter(or_(stamp_column < stamp, and_(stamp_column == stamp, id_column < row_id)))
+    query = query.order_by(None).order_by(stamp_column.desc(), id_column.desc())
+
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        stamp, row_id = key(last) if key else (getattr(last, stamp_column.key), getattr(last, id_column.key))
+        next_cursor = encode_cursor(t=stamp.isoformat(), k=row_id)
+    return Page(items, next_cursor)
+
+
+def offset_page(query, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Page through a relevance-ranked query, where there is no stable key to
+    seek on; the cursor carries the offset instead.
+    """
+    offset = decode_cursor(cursor).get("o", 0)
+    rows = query.limit(limit + 1).offset(offset).all()
+    next_cursor = encode_cursor(o=offset + limit) if len(rows) > limit else None
+    return Page(rows[:limit], next_cursor)
+
+
+def ids_page(ids, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Keyset over an in-memory set of ids (e.g. from an inverted index).
+    Returns (page_ids, next_cursor).
+    """
+    ordered = sorted(ids)
+    after = decode_cursor(cursor).get("k")
+    start = bisect.bisect_right(ordered, after) if after is not None else 0
+    page_ids = ordered[start:start + limit + 1]
+    next_cursor = encode_cursor(k=page_ids[limit - 1]) if len(page_ids) > limit else None
+    return page_ids[:limit], next_cursor
+
+
+def wants_json():
+    """True for "load more" requests that want the page as JSON."""
+    return (
+        request.args.get("format") == "json"
+        or request.is_json
+        or request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    )
+
+
+def page_json(page, serialize):
+    return {"items": [serialize(item) for item in page.items], "next_cursor": page.next_cursor}
+
+
+def next_page_url(cursor):
+    """URL of the current page with ?cursor= swapped for the next one."""
+    args = request.args.to_dict()
+    args.pop("format", None)
+    args["cursor"] = cursor
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# werkzeug 2.3's default; PASSWORD_HASH_METHOD overrides it, e.g.
+# "pbkdf2:sha256:600000" or "scrypt:65536:8:1"
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+def hash_method():
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD") or DEFAULT_METHOD
+    return DEFAULT_METHOD
+
+
+@lru_cache(maxsize=8)
+def _stored_prefix(method):
+    # werkzeug fills in defaults ("pbkdf2:sha256" -> "pbkdf2:sha256:600000"),
+    # so compare against what it actually writes
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def hash_password(password):
+    return generate_password_hash(password, hash_method())
+
+
+def verify_password(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """True if the hash was made with other parameters than the configured ones."""
+    return pwhash.split("$", 1)[0] != _stored_prefix(hash_method())
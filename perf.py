@@ -0,0 +1,345 @@
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event, func
+
+from cache import response_cache
+from counters import unread
+from models import db, Application, Hire, Job, Message, Notification, User
+from skills import skill_index
+
+# Each budget is measured as the user with the most rows on that page (a
+# page of one row can't show an N+1); these return that user's id, or None
+# when the database has nothing for the page to show.
+
+def _busiest(owner, *filters):
+    """The approved user owning the most rows (`owner` is their user id column)."""
+    count = func.count()
+    row = (
+        db.session.query(owner, count)
+        .join(User, User.id == owner)
+        .filter(User.is_approved == db.true(), *filters)
+        .group_by(owner)
+        .order_by(count.desc(), owner)
+        .first()
+    )
+    return row[0] if row else None
+
+
+def client_with_hires():
+    return _busiest(Hire.client_id, Hire.status == "hired")
+
+
+def client_with_applications():
+    return _busiest(Application.client_id)
+
+
+def client_with_workers():
+    if not User.query.filter_by(role="worker", is_approved=True).first():
+        return None
+    return _busiest(Job.client_id)
+
+
+def worker_with_hires():
+    return _busiest(Application.worker_id, Application.status == "hired")
+
+
+def worker_with_open_jobs():
+    if not Job.query.filter_by(is_open=True).first():
+        return None
+    return _busiest(Application.worker_id)
+
+
+def worker_with_notifications():
+    return _busiest(Notification.user_id, User.role == "worker")
+
+
+def worker_with_chats():
+    return _busiest(Message.receiver_id, User.role == "worker")
+
+
+def admin_with_users():
+    if User.query.filter(User.role != "admin").first() is None:
+        return None
+    admin = User.query.filter_by(role="admin").order_by(User.id).first()
+    return admin.id if admin else None
+
+
+# route -> (who to log in as, path, max SQL statements for the whole request)
+QUERY_BUDGETS = {
+    "clients.dashboard": (client_with_hires, "/client/dashboard", 8),
+    "clients.view_applications": (client_with_applications, "/applications", 6),
+    "clients.find_workers": (client_with_workers, "/find_workers", 6),
+    "workers.dashboard": (worker_with_hires, "/worker/dashboard", 5),
+    "workers.find_jobs": (worker_with_open_jobs, "/find_jobs", 6),
+    "messaging.notifications": (worker_with_notifications, "/notifications", 5),
+    "messaging.chats": (worker_with_chats, "/chats", 5),
+    "admin.users": (admin_with_users, "/admin/users", 5),
+}
+
+
+class QueryCounter:
+    """Counts SQL statements executed on the current thread."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+        self._thread = threading.get_ident()
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread:
+            self.count += 1
+            self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine=None):
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter._before_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter._before_execute)
+
+
+def check_query_budgets(app, budgets=QUERY_BUDGETS):
+    """
+    Request each budgeted page as the user its scenario picks and return
+    {route: (statements, budget, status)} for pages over budget or not
+    answering 200. A scenario with no data fails as (None, budget, "no data"):
+    an empty page would pass any budget.
+    """
+    over = {}
+    with app.app_context():
+        engine = db.engine
+        user_ids = {}
+        for name, (pick, _, budget) in budgets.items():
+            user_ids[name] = pick()
+            if user_ids[name] is None:
+                over[name] = (None, budget, "no data")
+
+    # requests run on a fresh thread so each gets its own app context,
+    # session and g, as in production, even when called from `flask ...`
+    # (which keeps an app context pushed that requests would otherwise share)
+    def run():
+        for name, (_, path, budget) in budgets.items():
+            if user_ids[name] is None:
+                continue
+            # measure the cold path: an earlier page must not have warmed this one
+            for kind in ("notifications", "messages"):
+                unread.invalidate(kind, user_ids[name])
+            skill_index.invalidate()
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session["_user_id"] = str(user_ids[name])
+                session["_fresh"] = True
+            with count_queries(engine) as counter:
+                response = client.get(path)
+            if response.status_code != 200 or counter.count > budget:
+                over[name] = (counter.count, budget, response.status_code)
+
+    cache_enabled, response_cache.enabled = response_cache.enabled, False
+    try:
+        worker = threading.Thread(target=run)
+        worker.start()
+        worker.join()
+    finally:
+        response_cache.enabled = cache_enabled
+    return over
+
+
+# ----------- REQUEST PROFILING -----------
+
+# upper bounds in seconds, as in Prometheus' default latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SAMPLE_SIZE = 1000
+
+METRICS = {
+    "duration_seconds": "wall time of the request",
+    "sql_statements": "SQL statements executed",
+    "sql_seconds": "time spent in SQL statements",
+    "template_seconds": "time spent rendering templates",
+    "response_bytes": "response body size",
+}
+
+
+class Histogram:
+    """
+    Prometheus-style cumulative buckets over every observation, plus the
+    last SAMPLE_SIZE values for percentiles.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestProfiler:
+    """
+    Opt-in (PERF_PROFILING) per-request instrumentation: wall time, SQL
+    statement count and time from engine events, template render time from
+    Flask's signals, and response size, aggregated per endpoint.
+
+    Everything is in-process memory, so each worker reports its own
+    numbers; scrape every worker, or run one, when comparing.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PERF_PROFILING", False)
+        app.config.setdefault("PERF_METRICS_TOKEN", None)
+        app.extensions["request_profiler"] = self
+        self.enabled = app.config["PERF_PROFILING"]
+        if not self.enabled:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._template_start, app)
+        template_rendered.connect(self._template_end, app)
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._sql_start)
+            event.listen(db.engine, "after_cursor_execute", self._sql_end)
+
+    @staticmethod
+    def _current():
+        # SQL from background threads and CLI commands has no request
+        return getattr(g, "_perf", None) if has_request_context() else None
+
+    def _start(self):
+        g._perf = {"started": time.perf_counter(), "sql": 0, "sql_seconds": 0.0,
+                   "templates": [], "template_seconds": 0.0}
+
+    def _sql_start(self, conn, cursor, statement, parameters, context, executemany):
+        stats = self._current()
+        if stats is not None:
+            context._perf_started = time.perf_counter()
+
+    def _sql_end(self, conn, cursor, statement, parameters, context, executemany):
+        stats = self._current()
+        started = getattr(context, "_perf_started", None)
+        if stats is not None and started is not None:
+            stats["sql"] += 1
+            stats["sql_seconds"] += time.perf_counter() - started
+
+    def _template_start(self, sender, template, context, **extra):
+        stats = self._current()
+        if stats is not None:
+            stats["templates"].append(time.perf_counter())
+
+    def _template_end(self, sender, template, context, **extra):
+        stats = self._current()
+        if stats is None or not stats["templates"]:
+            return
+        started = stats["templates"].pop()
+        # nested renders (a cached fragment inside a page) count once
+        if not stats["templates"]:
+            stats["template_seconds"] += time.perf_counter() - started
+
+    def _finish(self, response):
+        stats = self._current()
+        if stats is None:
+            return response
+        endpoint = request.endpoint or "<unmatched>"
+        # streamed bodies (SSE, files) have no length up front
+        size = response.calculate_content_length()
+        self.record(endpoint, {
+            "duration_seconds": time.perf_counter() - stats["started"],
+            "sql_statements": stats["sql"],
+            "sql_seconds": stats["sql_seconds"],
+            "template_seconds": stats["template_seconds"],
+            "response_bytes": size,
+        })
+        return response
+
+    def record(self, endpoint, values):
+        with self._lock:
+            histograms = self.endpoints.get(endpoint)
+            if histograms is None:
+                histograms = self.endpoints[endpoint] = {name: Histogram() for name in METRICS}
+            for name, value in values.items():
+                if value is not None:
+                    histograms[name].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def summary(self):
+        """[{endpoint, requests, <metric>: {p50, p95, p99, mean}}] slowest p95 first."""
+        rows = []
+        with self._lock:
+            for endpoint, histograms in self.endpoints.items():
+                row = {"endpoint": endpoint, "requests": histograms["duration_seconds"].count}
+                for name, hist in histograms.items():
+                    row[name] = {
+                        "p50": hist.percentile(50),
+                        "p95": hist.percentile(95),
+                        "p99": hist.percentile(99),
+                        "mean": hist.sum / hist.count if hist.count else None,
+                    }
+                rows.append(row)
+        return sorted(rows, key=lambda row: row["duration_seconds"]["p95"] or 0, reverse=True)
+
+    def prometheus(self):
+        """Text exposition format: a histogram for latency, summaries for the rest."""
+        lines = []
+        with self._lock:
+            items = sorted(self.endpoints.items())
+            lines.append(f"# HELP skilllink_request_duration_seconds {METRICS['duration_seconds']}")
+            lines.append("# TYPE skilllink_request_duration_seconds histogram")
+            for endpoint, histograms in items:
+                hist = histograms["duration_seconds"]
+                for bound, total in hist.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'skilllink_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{le}"}} {total}')
+                lines.append(f'skilllink_request_duration_seconds_sum{{endpoint="{endpoint}"}} {hist.sum:.6f}')
+                lines.append(f'skilllink_request_duration_seconds_count{{endpoint="{endpoint}"}} {hist.count}')
+            for name in list(METRICS)[1:]:
+                metric = f"skilllink_request_{name}"
+                lines.append(f"# HELP {metric} {METRICS[name]}")
+                lines.append(f"# TYPE {metric} summary")
+                for endpoint, histograms in items:
+                    hist = histograms[name]
+                    for q in (50, 95, 99):
+                        value = hist.percentile(q)
+                        if value is not None:
+                            lines.append(f'{metric}{{endpoint="{endpoint}",quantile="{q / 100}"}} {value:g}')
+                    lines.append(f'{metric}_sum{{endpoint="{endpoint}"}} {hist.sum:g}')
+                    lines.append(f'{metric}_count{{endpoint="{endpoint}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+
+profiler = RequestProfiler()
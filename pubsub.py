@@ -0,0 +1,67 @@
+import queue
+import threading
+
+from flask import current_app
+
+
+class Subscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.queue = queue.Queue()
+
+    def get(self, timeout=None):
+        """Next payload, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    In-process pub/sub with one queue per subscriber. Only reaches
+    subscribers in the same process; anything with the same
+    publish/subscribe interface can be set as PUBSUB_BROKER instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def subscribe(self, channel):
+        sub = Subscription(self, channel)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._channels.get(sub.channel)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._channels[sub.channel]
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subs = list(self._channels.get(channel, ()))
+        for sub in subs:
+            sub.queue.put(payload)
+        return len(subs)
+
+
+def init_app(app):
+    app.extensions["pubsub"] = app.config.get("PUBSUB_BROKER") or LocalBroker()
+
+
+def get_broker():
+    return current_app.extensions["pubsub"]
+
+
+def chat_channel(user_a, user_b):
+    low, high = sorted((user_a, user_b))
+    return f"chat:{low}:{high}"
@@ -0,0 +1,334 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from sqlalchemy import func, insert
+
+from models import db, Application, Job, JobMatch, User
+from tasks import tasks
+
+TOP_K = 20
+CHUNK = 500
+
+STOPWORDS = {
+    "and", "the", "for", "with", "need", "needed", "looking", "someone", "work", "job", "help",
+    "our", "your", "this", "that", "from", "will", "are", "have", "has", "can", "who", "all",
+    "per", "day", "hours", "hour", "urgent", "experienced", "professional", "skilled", "good",
+}
+SUFFIXES = ("ians", "ian", "ings", "ing", "ers", "er", "als", "al", "es", "s")
+WORD = re.compile(r"[a-z]+")
+
+_numeric = None
+
+
+def numeric():
+    """
+    (numpy, scipy.sparse), imported on first use rather than at startup,
+    which they would slow by a fifth of a second per worker; (None, None)
+    when missing, and the pure-Python scoring gives the same results, slower.
+    """
+    global _numeric
+    if _numeric is None:
+        try:
+            import numpy
+            from scipy import sparse
+            _numeric = (numpy, sparse)
+        except ImportError:
+            _numeric = (None, None)
+    return _numeric
+
+
+def stem(word):
+    # just enough to make plumber/plumbing/plumb and electrician/electrical meet
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    return [stem(w) for w in WORD.findall((text or "").lower()) if len(w) > 2 and w not in STOPWORDS]
+
+
+class WorkerCorpus:
+    """
+    TF-IDF vectors of approved workers' skills. The vocabulary and IDF come
+    from the workers' side only: a job word no worker has can't contribute
+    to any match, and rare skills weigh more than common ones.
+    """
+
+    def __init__(self, rows):
+        self.ids = [user_id for user_id, _ in rows]
+        docs = [Counter(tokenize(skills)) for _, skills in rows]
+        df = Counter(term for doc in docs for term in doc)
+        self.vocab = {term: i for i, term in enumerate(sorted(df))}
+        n = len(docs)
+        self.idf = {term: math.log((1 + n) / (1 + count)) + 1 for term, count in df.items()}
+        self.vectors = [self.weigh(doc) for doc in docs]
+
+        self._postings = defaultdict(list)
+        for row, vec in enumerate(self.vectors):
+            for term, weight in vec.items():
+                self._postings[term].append((row, weight))
+        self._matrix = to_matrix(self.vectors, len(self.vocab)) if numeric()[1] is not None else None
+
+    def weigh(self, counts):
+        """L2-normalized tf-idf over this corpus' vocabulary, as {term index: weight}."""
+        vec = {self.vocab[t]: c * self.idf[t] for t, c in counts.items() if t in self.vocab}
+        norm = math.sqrt(sum(w * w for w in vec.values()))
+        return {i: w / norm for i, w in vec.items()} if norm else {}
+
+    def vectorize(self, text):
+        return self.weigh(Counter(tokenize(text)))
+
+    def score(self, vec):
+        """{worker id: cosine similarity} for every worker sharing a term with vec."""
+        if not vec:
+            return {}
+        if self._matrix is not None:
+            np, _ = numeric()
+            column = to_matrix([vec], len(self.vocab)).T
+            scores = (self._matrix @ column).toarray().ravel()
+            return {self.ids[row]: float(scores[row]) for row in np.flatnonzero(scores)}
+        totals = defaultdict(float)
+        for term, weight in vec.items():
+            for row, w in self._postings[term]:
+                totals[row] += weight * w
+        return {self.ids[row]: s for row, s in totals.items()}
+
+
+def to_matrix(vectors, width):
+    _, sparse = numeric()
+    data, indices, indptr = [], [], [0]
+    for vec in vectors:
+        indices.extend(vec.keys())
+        data.extend(vec.values())
+        indptr.append(len(indices))
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(vectors), width))
+
+
+def _top(scores, k):
+    return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def _kth_scores(column, ids, k):
+    """{id: k-th best stored score} for ids that already have k matches."""
+    floors = {}
+    for i in range(0, len(ids), CHUNK):
+        ranked = db.session.query(
+            column.label("owner"), JobMatch.score,
+            func.row_number().over(partition_by=column, order_by=JobMatch.score.desc()).label("rank"),
+        ).filter(column.in_(ids[i:i + CHUNK])).subquery()
+        floors.update(db.session.query(ranked.c.owner, ranked.c.score).filter(ranked.c.rank == k))
+    return floors
+
+
+class Recommender:
+    """
+    Keeps job_match holding, for every open job, its TOP_K best workers and,
+    for every approved worker, their TOP_K best jobs. A new job or a worker
+    edit only scores that one document against the other side, so the
+    dashboards read recommendations with a single index range scan.
+    """
+
+    def __init__(self, app=None):
+        self.top_k = TOP_K
+        # task threads share these; refreshes run under the lock and publish
+        # new objects, so a reader's corpus or postings never change under it
+        self._lock = threading.Lock()
+        self._corpus = None         # (version, WorkerCorpus)
+        self._job_postings = None   # (corpus, {job id: (updated_at, vector)}, postings)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RECOMMEND_TOP_K", TOP_K)
+        self.top_k = app.config["RECOMMEND_TOP_K"]
+        app.extensions["recommender"] = self
+
+    def version(self):
+        """
+        Changes whenever the approved workers or their skills do, in any
+        process: their count (deletions) and the newest worker_changed_at.
+        Both come from an index.
+        """
+        workers = db.session.query(User.id).filter(User.role == "worker")
+        return db.session.query(
+            workers.filter(User.is_approved == db.true()).with_entities(func.count(User.id)).scalar_subquery(),
+            workers.with_entities(func.max(User.worker_changed_at)).scalar_subquery(),
+        ).one()
+
+    def corpus(self):
+        version = tuple(self.version())
+        with self._lock:
+            if self._corpus is None or self._corpus[0] != version:
+                rows = db.session.query(User.id, User.skills).filter(
+                    User.role == "worker", User.is_approved == db.true()
+                ).order_by(User.id).all()
+                self._corpus = (version, WorkerCorpus(rows))
+            return self._corpus[1]
+
+    def job_postings(self, corpus):
+        """
+        {term index: [(job id, weight)]} over the open jobs, for scoring a
+        worker against all of them. Job vectors are kept per corpus version
+        and only new or edited jobs are re-tokenized.
+        """
+        stamps = dict(db.session.query(Job.id, Job.updated_at).filter(Job.is_open == db.true()))
+        with self._lock:
+            cached = self._job_postings
+            if cached is not None and cached[0] is corpus:
+                jobs = {job_id: entry for job_id, entry in cached[1].items() if job_id in stamps}
+            else:
+                cached, jobs = None, {}
+            stale = [job_id for job_id, at in stamps.items() if job_id not in jobs or jobs[job_id][0] != at]
+            if cached is not None and not stale and len(jobs) == len(cached[1]):
+                return cached[2]
+            for i in range(0, len(stale), CHUNK):
+                for job_id, at, title, description in db.session.query(
+                    Job.id, Job.updated_at, Job.title, Job.description
+                ).filter(Job.id.in_(stale[i:i + CHUNK])):
+                    jobs[job_id] = (at, corpus.vectorize(f"{title} {description}"))
+
+            postings = defaultdict(list)
+            for job_id, (_, vec) in jobs.items():
+                for term, weight in vec.items():
+                    postings[term].append((job_id, weight))
+            self._job_postings = (corpus, jobs, postings)
+            return postings
+
+    def _insert(self, pairs):
+        rows = [{"job_id": j, "worker_id": w, "score": s} for (j, w), s in pairs.items()]
+        for i in range(0, len(rows), CHUNK):
+            db.session.execute(insert(JobMatch).prefix_with("OR REPLACE", dialect="sqlite"), rows[i:i + CHUNK])
+
+    def job_posted(self, job_id):
+        """Match one new or edited job against every approved worker."""
+        job = db.session.get(Job, job_id)
+        JobMatch.query.filter_by(job_id=job_id).delete()
+        if job is None or not job.is_open:
+            db.session.commit()
+            return 0
+        corpus = self.corpus()
+        scores = corpus.score(corpus.vectorize(f"{job.title} {job.description}"))
+        pairs = {(job_id, w): s for w, s in _top(scores, self.top_k)}
+        # ...and for workers this job beats one of their current top-k jobs
+        floors = _kth_scores(JobMatch.worker_id, list(scores), self.top_k)
+        pairs.update({(job_id, w): s for w, s in scores.items() if s > floors.get(w, 0)})
+        self._insert(pairs)
+        db.session.commit()
+        return len(pairs)
+
+    def worker_changed(self, worker_id):
+        """Re-match one worker after a skills edit, approval or rejection."""
+        return self.workers_changed([worker_id])
+
+    def workers_changed(self, worker_ids):
+        """Re-match several workers, reading the open jobs once; commits per worker."""
+        corpus = self.corpus()
+        postings = None
+        written = 0
+        for worker_id in worker_ids:
+            JobMatch.query.filter_by(worker_id=worker_id).delete()
+            if worker_id not in corpus.ids:
+                db.session.commit()
+                continue
+            if postings is None:
+                postings = self.job_postings(corpus)
+            scores = defaultdict(float)
+            for term, weight in corpus.vectors[corpus.ids.index(worker_id)].items():
+                for job_id, w in postings.get(term, ()):
+                    scores[job_id] += weight * w
+            pairs = {(j, worker_id): s for j, s in _top(scores, self.top_k)}
+            floors = _kth_scores(JobMatch.job_id, list(scores), self.top_k)
+            pairs.update({(j, worker_id): s for j, s in scores.items() if s > floors.get(j, 0)})
+            self._insert(pairs)
+            db.session.commit()
+            written += len(pairs)
+        return written
+
+    def rebuild(self):
+        """Recompute the whole table; returns the number of rows written."""
+        with self._lock:
+            self._corpus = None
+        corpus = self.corpus()
+        jobs = db.session.query(Job.id, Job.title, Job.description).filter(Job.is_open == db.true()).all()
+        job_vectors = [corpus.vectorize(f"{title} {description}") for _, title, description in jobs]
+
+        per_worker = defaultdict(list)   # worker id -> heap of (score, job id)
+        pairs = {}
+        for (job_id, _, _), vec in zip(jobs, job_vectors):
+            scores = corpus.score(vec)
+            pairs.update({(job_id, w): s for w, s in _top(scores, self.top_k)})
+            for w, s in scores.items():
+                heap = per_worker[w]
+                if len(heap) < self.top_k:
+                    heapq.heappush(heap, (s, job_id))
+                elif s > heap[0][0]:
+                    heapq.heapreplace(heap, (s, job_id))
+        for w, heap in per_worker.items():
+            pairs.update({(job_id, w): s for s, job_id in heap})
+
+        JobMatch.query.delete()
+        self._insert(pairs)
+        db.session.commit()
+        return len(pairs)
+
+
+def recommended_jobs(worker_id, limit=5):
+    """[(Job, score)] best-matching open jobs the worker hasn't applied to."""
+    applied = db.session.query(Application.id).filter(
+        Application.worker_id == worker_id, Application.job_id == JobMatch.job_id
+    ).exists()
+    return (
+        db.session.query(Job, JobMatch.score)
+        .join(JobMatch, JobMatch.job_id == Job.id)
+        .filter(JobMatch.worker_id == worker_id, Job.is_open == db.true(), ~applied)
+        .order_by(JobMatch.score.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def recommended_workers(job_ids, limit=6, exclude=()):
+    """[(User, score)] approved workers best matching any of these jobs."""
+    if not job_ids:
+        return []
+    best = func.max(JobMatch.score).label("score")
+    query = (
+        db.session.query(User, best)
+        .join(JobMatch, JobMatch.worker_id == User.id)
+        .filter(JobMatch.job_id.in_(job_ids), User.is_approved == db.true())
+    )
+    if exclude:
+        query = query.filter(User.id.notin_(exclude))
+    return query.group_by(User.id).order_by(best.desc()).limit(limit).all()
+
+
+def match_scores(worker_id, job_ids):
+    """{job id: score} for this worker among the given jobs."""
+    if not job_ids:
+        return {}
+    return dict(db.session.query(JobMatch.job_id, JobMatch.score).filter(
+        JobMatch.worker_id == worker_id, JobMatch.job_id.in_(job_ids)))
+
+
+@tasks.task("recommend.job")
+def job_task(job_id):
+    recommender.job_posted(job_id)
+
+
+@tasks.task("recommend.worker")
+def worker_task(worker_id):
+    recommender.worker_changed(worker_id)
+
+
+@tasks.task("recommend.workers")
+def workers_task(worker_ids):
+    # a bulk approval: the corpus is rebuilt and the jobs read once for all of them
+    recommender.workers_changed(worker_ids)
+
+
+recommender = Recommender()
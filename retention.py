@@ -0,0 +1,227 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, literal, select, text
+
+import rollups
+from models import db, Conversation, DailyStat, Message, MessageArchive, Notification, Task
+from tasks import tasks
+
+log = logging.getLogger(__name__)
+
+# daily_stat metrics (see rollups.py)
+PURGED = "retention_rows"          # key: policy
+RECLAIMED = "retention_reclaimed"  # total: bytes returned to the filesystem
+
+ARCHIVED_COLUMNS = ("id", "conversation_id", "sender_id", "receiver_id", "content", "timestamp", "is_read")
+
+
+class Retention:
+    """
+    Keeps notification, message and task from growing without bound:
+
+    - read notifications older than RETENTION_READ_NOTIFICATION_DAYS are deleted;
+    - read messages older than RETENTION_MESSAGE_ARCHIVE_DAYS move to
+      message_archive (a conversation's last message stays, the inbox shows it);
+    - finished tasks older than RETENTION_TASK_DAYS are deleted.
+
+    Rows go in batches of RETENTION_BATCH_SIZE, each its own short
+    transaction with a pause after it, so request writers never wait long
+    on the SQLite write lock. A pass runs as the "retention.run" task, which
+    queues the next pass RETENTION_INTERVAL_SECONDS later, and ends with an
+    incremental VACUUM. Rows purged and bytes reclaimed are counted in
+    daily_stat, so every process reports the same totals on /metrics.
+
+    Setting a policy's days to 0 turns it off.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.interval = 3600
+        self.batch_size = 500
+        self.pause = 0.05
+        self.policies = {}
+        self.vacuum_pages = 2000
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RETENTION_ENABLED", True)
+        app.config.setdefault("RETENTION_INTERVAL_SECONDS", 3600)
+        app.config.setdefault("RETENTION_BATCH_SIZE", 500)
+        app.config.setdefault("RETENTION_BATCH_PAUSE_SECONDS", 0.05)
+        app.config.setdefault("RETENTION_READ_NOTIFICATION_DAYS", 30)
+        app.config.setdefault("RETENTION_MESSAGE_ARCHIVE_DAYS", 180)
+        app.config.setdefault("RETENTION_TASK_DAYS", 7)
+        app.config.setdefault("RETENTION_VACUUM_PAGES", 2000)
+        self.enabled = app.config["RETENTION_ENABLED"]
+        self.interval = app.config["RETENTION_INTERVAL_SECONDS"]
+        self.batch_size = app.config["RETENTION_BATCH_SIZE"]
+        self.pause = app.config["RETENTION_BATCH_PAUSE_SECONDS"]
+        self.policies = {
+            "read_notifications": (app.config["RETENTION_READ_NOTIFICATION_DAYS"], self.purge_notifications),
+            "archived_messages": (app.config["RETENTION_MESSAGE_ARCHIVE_DAYS"], self.archive_messages),
+            "finished_tasks": (app.config["RETENTION_TASK_DAYS"], self.purge_tasks),
+        }
+        self.vacuum_pages = app.config["RETENTION_VACUUM_PAGES"]
+        app.extensions["retention"] = self
+
+    # ----------- POLICIES -----------
+
+    def _sweep(self, query, model, stamp, cutoff, act):
+        """
+        Apply act(ids) to the rows of `query` older than `cutoff`, walking
+        the primary key a batch at a time. Ids grow with time, so the walk
+        stops at the first batch lying wholly inside the retention window
+        (a whole batch, not a row, so clock skew between writers is harmless).
+        """
+        after, done = 0, 0
+        while True:
+            rows = (query.with_entities(model.id, stamp).filter(model.id > after)
+                    .order_by(model.id).limit(self.batch_size).all())
+            old = [row_id for row_id, at in rows if at is not None and at < cutoff]
+            if old:
+                act(old)
+                db.session.commit()
+                done += len(old)
+            if not old or len(rows) < self.batch_size:
+                return done
+            after = rows[-1][0]
+            time.sleep(self.pause)
+
+    def purge_notifications(self, cutoff):
+        # unread ones stay: they are still on the badge count
+        read = Notification.query.filter(Notification.is_read == db.true())
+        return self._sweep(read, Notification, Notification.timestamp, cutoff,
+                           lambda ids: Notification.query.filter(Notification.id.in_(ids))
+                           .delete(synchronize_session=False))
+
+    def archive_messages(self, cutoff):
+        last = select(Conversation.last_message_id).where(Conversation.last_message_id.isnot(None))
+        read = Message.query.filter(Message.is_read == db.true(), Message.id.notin_(last))
+
+        def move(ids):
+            columns = [getattr(Message, name) for name in ARCHIVED_COLUMNS]
+            db.session.execute(insert(MessageArchive).from_select(
+                list(ARCHIVED_COLUMNS) + ["archived_at"],
+                select(*columns, literal(datetime.utcnow())).where(Message.id.in_(ids)),
+            ))
+            Message.query.filter(Message.id.in_(ids)).delete(synchronize_session=False)
+
+        return self._sweep(read, Message, Message.timestamp, cutoff, move)
+
+    def purge_tasks(self, cutoff):
+        removed = 0
+        for status in ("done", "failed"):
+            while True:
+                ids = [task_id for (task_id,) in finished_tasks(status, cutoff).limit(self.batch_size)]
+                if not ids:
+                    break
+                Task.query.filter(Task.id.in_(ids)).delete(synchronize_session=False)
+                db.session.commit()
+                removed += len(ids)
+                time.sleep(self.pause)
+        return removed
+
+    # ----------- SPACE -----------
+
+    def _pragma(self, name):
+        return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+    def vacuum(self):
+        """
+        Return up to RETENTION_VACUUM_PAGES free pages to the filesystem;
+        returns the bytes reclaimed. Needs auto_vacuum=INCREMENTAL, which
+        new databases get and `flask vacuum` converts an old one to.
+        """
+        if db.engine.dialect.name != "sqlite" or self._pragma("auto_vacuum") != 2:
+            return 0
+        before = self._pragma("freelist_count")
+        db.session.commit()
+        # each step of the pragma frees one page and the sqlite3 module steps a
+        # statement without result columns only once; executescript runs it out
+        with db.engine.connect() as conn:
+            conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});")
+        return (before - self._pragma("freelist_count")) * self._pragma("page_size")
+
+    def full_vacuum(self):
+        """Switch to incremental auto-vacuum and rebuild the file (locks it throughout)."""
+        with db.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+            conn.execute(text("VACUUM"))
+
+    # ----------- RUNNING -----------
+
+    def run(self):
+        """One pass over every policy; returns {policy: rows} plus bytes reclaimed."""
+        now = datetime.utcnow()
+        report = {}
+        for name, (days, apply) in self.policies.items():
+            if not days:
+                continue
+            started = time.perf_counter()
+            report[name] = apply(now - timedelta(days=days))
+            if report[name]:
+                rollups.incr(PURGED, key=name, count=report[name])
+                db.session.commit()
+            log.info("retention %s: %d rows in %.1fs", name, report[name], time.perf_counter() - started)
+        report["reclaimed_bytes"] = self.vacuum()
+        if report["reclaimed_bytes"]:
+            rollups.incr(RECLAIMED, total=report["reclaimed_bytes"])
+            db.session.commit()
+        return report
+
+    def schedule(self, delay=0):
+        """Queue the next pass unless one is already waiting. Commits."""
+        if not self.enabled:
+            return
+        # pending only: the running pass calls this to queue its successor
+        waiting = db.session.query(Task.id).filter(Task.name == "retention.run", Task.status == "pending").first()
+        if waiting is None:
+            tasks.enqueue("retention.run", delay=delay)
+            db.session.commit()
+
+    def prometheus(self):
+        """Purge and reclaim totals plus the database's current size, in exposition format."""
+        purged = db.session.query(DailyStat.key, func.sum(DailyStat.count)).filter(
+            DailyStat.metric == PURGED).group_by(DailyStat.key).all()
+        reclaimed = db.session.query(func.sum(DailyStat.total)).filter(DailyStat.metric == RECLAIMED).scalar()
+        lines = [
+            "# HELP skilllink_retention_rows_total Rows deleted or archived by retention policies",
+            "# TYPE skilllink_retention_rows_total counter",
+        ]
+        lines += [f'skilllink_retention_rows_total{{policy="{policy}"}} {count}' for policy, count in purged]
+        lines += [
+            "# HELP skilllink_retention_reclaimed_bytes_total Bytes returned to the filesystem by incremental vacuum",
+            "# TYPE skilllink_retention_reclaimed_bytes_total counter",
+            f"skilllink_retention_reclaimed_bytes_total {reclaimed or 0}",
+        ]
+        if db.engine.dialect.name == "sqlite":
+            page_size = self._pragma("page_size")
+            lines += [
+                "# HELP skilllink_db_bytes Database file size and the part of it that is free pages",
+                "# TYPE skilllink_db_bytes gauge",
+                f'skilllink_db_bytes{{kind="total"}} {self._pragma("page_count") * page_size}',
+                f'skilllink_db_bytes{{kind="free"}} {self._pragma("freelist_count") * page_size}',
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def finished_tasks(status, cutoff):
+    """Ids of tasks in `status` that finished before cutoff, through ix_task_status_finished_at."""
+    return db.session.query(Task.id).filter(Task.status == status, Task.finished_at < cutoff)
+
+
+@tasks.task("retention.run")
+def retention_task():
+    # a failed pass must not end the schedule: the retry and the next pass are separate tasks
+    try:
+        retention.run()
+    finally:
+        db.session.rollback()   # whatever a failed pass left half-done
+        retention.schedule(delay=retention.interval)
+
+
+retention = Retention()
@@ -0,0 +1,152 @@
+"""
+Daily analytics rollups for the admin dashboard.
+
+Each write path adds to one row per (metric, day, key) of daily_stat with
+an UPSERT in the caller's transaction, so the counters commit or roll back
+with the change they count. The dashboard reads only these rows: its cost
+depends on the number of days shown, not on the size of job, application
+or rating. rebuild() recomputes everything from the raw tables.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Application, DailyStat, Job, Rating, Skill, User, UserSkill
+
+SIGNUPS = "signups"              # key: role
+JOBS = "jobs_posted"
+APPLICATIONS = "applications"
+HIRES = "hires"
+RATINGS = "ratings"              # total: sum of scores
+SKILL_RATINGS = "skill_ratings"  # key: a skill tag of the rated user; total: sum of scores
+
+DEFAULT_DAYS = 30
+TOP_SKILLS = 10
+
+
+def today():
+    return datetime.utcnow().date()
+
+
+def _upsert(rows):
+    insert = postgresql.insert if db.session.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(DailyStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStat.metric, DailyStat.day, DailyStat.key],
+        set_={"count": DailyStat.count + stmt.excluded.count, "total": DailyStat.total + stmt.excluded.total},
+    )
+    db.session.execute(stmt, rows)
+
+
+def incr(metric, key="", count=1, total=0, day=None):
+    """Add to one day's counter in the current transaction. Does not commit."""
+    _upsert([{"metric": metric, "day": day or today(), "key": key, "count": count, "total": total}])
+
+
+def rating_recorded(recipient_id, score, replaced=None):
+    """
+    Count a rating overall and under each of the recipient's skill tags.
+    `replaced` is the (day, score) of the rating this one overwrote, which
+    is taken back out. Does not commit.
+    """
+    skills = [name for (name,) in db.session.query(Skill.name).join(UserSkill, UserSkill.skill_id == Skill.id)
+              .filter(UserSkill.user_id == recipient_id)]
+    changes = [(today(), 1, score)]
+    if replaced:
+        changes.append((replaced[0], -1, -replaced[1]))
+    _upsert([
+        {"metric": metric, "day": day, "key": key, "count": count, "total": total}
+        for day, count, total in changes
+        for metric, key in [(RATINGS, "")] + [(SKILL_RATINGS, name) for name in skills]
+    ])
+
+
+# ----------- REBUILD -----------
+
+def _day(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def rebuild():
+    """
+    Recompute daily_stat from the raw tables; returns the rows written.
+    Users from before User.created_at have no signup day and are skipped;
+    a hire counts on its application's last update.
+    """
+    def grouped(stamp, key, count, total):
+        day = func.date(stamp)
+        return db.session.query(day, key, count, total).group_by(day, key)
+
+    none = literal("")
+    sources = {
+        SIGNUPS: grouped(User.created_at, User.role, func.count(User.id), literal(0))
+            .filter(User.created_at.isnot(None), User.role != "admin"),
+        JOBS: grouped(Job.created_at, none, func.count(Job.id), literal(0)),
+        APPLICATIONS: grouped(Application.timestamp, none, func.count(Application.id), literal(0)),
+        HIRES: grouped(Application.updated_at, none, func.count(Application.id), literal(0))
+            .filter(Application.status == "hired"),
+        RATINGS: grouped(Rating.created_at, none, func.count(Rating.id), func.sum(Rating.score)),
+        SKILL_RATINGS: grouped(Rating.created_at, Skill.name, func.count(Rating.id), func.sum(Rating.score))
+            .join(UserSkill, UserSkill.user_id == Rating.recipient_id)
+            .join(Skill, Skill.id == UserSkill.skill_id),
+    }
+    rows = [
+        {"metric": metric, "day": _day(d), "key": k or "", "count": count, "total": total or 0}
+        for metric, query in sources.items()
+        for d, k, count, total in query
+        if d is not None
+    ]
+
+    DailyStat.query.delete()
+    if rows:
+        _upsert(rows)
+    db.session.commit()
+    return len(rows)
+
+
+# ----------- READING -----------
+
+def summary(days=DEFAULT_DAYS):
+    """
+    The dashboard's numbers for the last `days` days, from daily_stat only:
+    a zero-filled daily series per metric, window totals and ratios, and
+    the most-rated skills with their average rating.
+    """
+    end = today()
+    start = end - timedelta(days=days - 1)
+    daily = (
+        db.session.query(DailyStat.metric, DailyStat.day, func.sum(DailyStat.count), func.sum(DailyStat.total))
+        .filter(DailyStat.metric.in_([SIGNUPS, JOBS, APPLICATIONS, HIRES, RATINGS]),
+                DailyStat.day.between(start, end))
+        .group_by(DailyStat.metric, DailyStat.day)
+        .all()
+    )
+    skills = (
+        db.session.query(DailyStat.key, func.sum(DailyStat.count).label("n"), func.sum(DailyStat.total))
+        .filter(DailyStat.metric == SKILL_RATINGS, DailyStat.day.between(start, end))
+        .group_by(DailyStat.key)
+        .having(func.sum(DailyStat.count) > 0)
+        .order_by(func.sum(DailyStat.count).desc())
+        .limit(TOP_SKILLS)
+        .all()
+    )
+
+    days_list = [start + timedelta(days=i) for i in range(days)]
+    counts = {metric: dict.fromkeys(days_list, 0) for metric in (SIGNUPS, JOBS, APPLICATIONS, HIRES, RATINGS)}
+    score_total = 0
+    for metric, day, count, total in daily:
+        counts[metric][_day(day)] = count
+        if metric == RATINGS:
+            score_total += total or 0
+
+    totals = {metric: sum(series.values()) for metric, series in counts.items()}
+    return {
+        "days": days,
+        "series": {metric: [(d.isoformat(), n) for d, n in series.items()] for metric, series in counts.items()},
+        "totals": totals,
+        "applications_per_job": round(totals[APPLICATIONS] / totals[JOBS], 2) if totals[JOBS] else None,
+        "hire_rate": round(100 * totals[HIRES] / totals[APPLICATIONS], 1) if totals[APPLICATIONS] else None,
+        "avg_rating": round(score_total / totals[RATINGS], 2) if totals[RATINGS] else None,
+        "skills": [(name, n, round(total / n, 2)) for name, n, total in skills],
+    }
@@ -0,0 +1,172 @@
+import re
+
+from sqlalchemy import column, literal_column, or_, table, text
+
+import geo
+from models import db, Job, User
+
+# external-content FTS5 tables over job and user, kept in sync by triggers
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS job_fts USING fts5(
+        title, description, location,
+        content='job', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_ai AFTER INSERT ON job BEGIN
+        INSERT INTO job_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_ad AFTER DELETE ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_au AFTER UPDATE OF title, description, location ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+        INSERT INTO job_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS worker_fts USING fts5(
+        name, skills,
+        content='user', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS worker_fts_ai AFTER INSERT ON user BEGIN
+        INSERT INTO worker_fts(rowid, name, skills) VALUES (new.id, new.name, new.skills);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS worker_fts_ad AFTER DELETE ON user BEGIN
+        INSERT INTO worker_fts(worker_fts, rowid, name, skills) VALUES ('delete', old.id, old.name, old.skills);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS worker_fts_au AFTER UPDATE OF name, skills ON user BEGIN
+        INSERT INTO worker_fts(worker_fts, rowid, name, skills) VALUES ('delete', old.id, old.name, old.skills);
+        INSERT INTO worker_fts(rowid, name, skills) VALUES (new.id, new.name, new.skills);
+    END""",
+]
+
+job_fts = table("job_fts", column("rowid"))
+worker_fts = table("worker_fts", column("rowid"))
+
+_fts_enabled = None
+
+
+def fts_enabled():
+    """
+    Whether the FTS5 tables exist. A process that didn't run install()
+    (every web worker, since `flask init-db` does) looks once.
+    """
+    global _fts_enabled
+    if _fts_enabled is None:
+        _fts_enabled = db.engine.dialect.name == "sqlite" and db.session.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE name IN ('job_fts', 'worker_fts')"
+        )).scalar() == 2
+    return _fts_enabled
+
+
+def install():
+    """
+    Create the FTS5 tables and triggers, rebuilding the index the first
+    time. Leaves search on the ILIKE fallback if the database isn't SQLite
+    or was built without FTS5.
+    """
+    global _fts_enabled
+    if db.engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return False
+
+    with db.engine.begin() as conn:
+        existing = {
+            row[0] for row in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE name IN ('job_fts', 'worker_fts')")
+            )
+        }
+        try:
+            for ddl in FTS_SCHEMA:
+                conn.execute(text(ddl))
+        except Exception:
+            _fts_enabled = False
+            return False
+        if "job_fts" not in existing:
+            conn.execute(text("INSERT INTO job_fts(job_fts) VALUES ('rebuild')"))
+        if "worker_fts" not in existing:
+            conn.execute(text("INSERT INTO worker_fts(worker_fts) VALUES ('rebuild')"))
+
+    _fts_enabled = True
+    return True
+
+
+def _terms(value):
+    return re.findall(r"\w+", (value or "").lower())
+
+
+def _prefix_query(terms):
+    # every term must match, each as a prefix: "plumb"* "sink"*
+    return "(" + " ".join(f'"{t}"*' for t in terms) + ")"
+
+
+def search_jobs(search="", location="", near=None, open_only=True):
+    """
+    Open jobs matching `search` (title/description) and `location`, best
+    match first, or newest first when there is nothing to rank. `near` is
+    ((lat, lon), km): only jobs that close, nearest first. Returns a query
+    so callers can add filters and paginate.
+    """
+    query = Job.query.filter(Job.is_open == True) if open_only else Job.query
+    order = [Job.id.desc()]
+    if near is not None:
+        query, distance = geo.within(query, Job, *near)
+        order = [distance, Job.id.desc()]
+    search_terms, location_terms = _terms(search), _terms(location)
+
+    if not (search_terms or location_terms):
+        return query.order_by(*order)
+
+    if not fts_enabled():
+        if search:
+            query = query.filter(or_(Job.title.ilike(f"%{search}%"), Job.description.ilike(f"%{search}%")))
+        if location:
+            query = query.filter(Job.location.ilike(f"%{location}%"))
+        return query.order_by(*order)
+
+    clauses = []
+    if search_terms:
+        clauses.append("{title description} : " + _prefix_query(search_terms))
+    if location_terms:
+        clauses.append("location : " + _prefix_query(location_terms))
+    if near is None:
+        order = [literal_column("job_fts.rank"), Job.id.desc()]
+
+    return (
+        query.join(job_fts, job_fts.c.rowid == Job.id)
+        .filter(literal_column("job_fts").op("MATCH")(" AND ".join(clauses)))
+        .order_by(*order)
+    )
+
+
+def search_workers(skill="", location="", near=None):
+    """
+    Approved workers whose skills match `skill`, best match first; with
+    `near` ((lat, lon), km), only workers that close, nearest first.
+    `location` is matched as text, for places geocoding doesn't know.
+    """
+    query = User.query.filter(User.role == 'worker', User.is_approved == True)
+    if location:
+        query = query.filter(User.location.ilike(f"%{location}%"))
+    order = [User.id]
+    if near is not None:
+        query, distance = geo.within(query, User, *near)
+        order = [distance, User.id]
+    terms = _terms(skill)
+
+    if not terms:
+        return query.order_by(*order)
+
+    if not fts_enabled():
+        return query.filter(User.skills.ilike(f"%{skill}%")).order_by(*order)
+
+    if near is None:
+        order = [literal_column("worker_fts.rank"), User.id]
+    return (
+        query.join(worker_fts, worker_fts.c.rowid == User.id)
+        .filter(literal_column("worker_fts").op("MATCH")("skills : " + _prefix_query(terms)))
+        .order_by(*order)
+    )
@@ -0,0 +1,64 @@
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def user_json(user):
+    """Public profile fields only — never email, aadhar or password."""
+    return {
+        "id": user.id,
+        "name": user.name,
+        "role": user.role,
+        "skills": user.skills,
+        "city": user.city,
+        "is_approved": user.is_approved,
+        "avg_rating": user.avg_rating(),
+        "rating_count": user.rating_count(),
+    }
+
+
+def job_json(job):
+    return {
+        "id": job.id,
+        "title": job.title,
+        "description": job.description,
+        "location": job.location,
+        "city": job.city,
+        "lat": job.lat,
+        "lon": job.lon,
+        "client_id": job.client_id,
+        "is_open": job.is_open,
+        "created_at": _iso(job.created_at),
+        "updated_at": _iso(job.updated_at),
+    }
+
+
+def application_json(application):
+    return {
+        "id": application.id,
+        "job_id": application.job_id,
+        "worker_id": application.worker_id,
+        "client_id": application.client_id,
+        "status": application.status,
+        "timestamp": _iso(application.timestamp),
+        "updated_at": _iso(application.updated_at),
+    }
+
+
+def notification_json(note):
+    return {
+        "id": note.id,
+        "message": note.message,
+        "is_read": note.is_read,
+        "timestamp": _iso(note.timestamp),
+    }
+
+
+def message_json(msg):
+    return {
+        "id": msg.id,
+        "sender_id": msg.sender_id,
+        "receiver_id": msg.receiver_id,
+        "content": msg.content,
+        "is_read": msg.is_read,
+        "timestamp": _iso(msg.timestamp),
+    }
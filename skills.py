@@ -0,0 +1,187 @@
+import bisect
+import re
+import threading
+import time
+
+from models import db, Skill, User, UserSkill
+from pagination import DEFAULT_LIMIT, Page, ids_page
+from recommend import stem
+
+MAX_SKILL_WORDS = 3
+
+_SPLIT = re.compile(r"[,;/|\n&+]|\band\b")
+
+
+def _words(value):
+    return re.findall(r"[a-z0-9]+", (value or "").lower())
+
+
+def _stemmed(words):
+    # the recommender's stemmer, so "plumber" meets "plumbing"
+    return " ".join(stem(word) for word in words)
+
+
+def parse_skills(text):
+    """
+    Split a free-text skills blob into normalized tags:
+    "Plumbing, Electrical work & painting" -> ["plumbing", "electrical work", "painting"]
+    """
+    tags = []
+    for part in _SPLIT.split((text or "").lower()):
+        words = _words(part)[:MAX_SKILL_WORDS]
+        tag = " ".join(words)[:50]
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def sync_user_skills(user):
+    """
+    Replace the user's UserSkill rows with the tags parsed from user.skills.
+    Does not commit; the in-process index is refreshed for approved workers.
+    """
+    names = parse_skills(user.skills) if user.role == 'worker' else []
+
+    known = {s.name: s for s in Skill.query.filter(Skill.name.in_(names))} if names else {}
+    for name in names:
+        if name not in known:
+            known[name] = Skill(name=name)
+            db.session.add(known[name])
+    db.session.flush()
+
+    UserSkill.query.filter_by(user_id=user.id).delete()
+    db.session.add_all(UserSkill(user_id=user.id, skill_id=known[name].id) for name in names)
+
+    skill_index.remove_user(user.id)
+    if user.is_approved:
+        skill_index.add_user(user.id, names)
+    return names
+
+
+def rebuild_user_skills():
+    """
+    Re-tokenize every user's skills text into Skill/UserSkill rows.
+    """
+    UserSkill.query.delete()
+    users = User.query.filter(User.role == 'worker', User.skills.isnot(None)).all()
+    for user in users:
+        sync_user_skills(user)
+    db.session.commit()
+    skill_index.invalidate()
+    return len(users)
+
+
+class SkillIndex:
+    """
+    In-process inverted index from skill name to approved worker ids.
+
+    Rebuilt from user_skill when older than `ttl` seconds so that other
+    processes' writes show up; local writes update it in place. Also keyed
+    by stemmed name, for matching free text such as a job description.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._stems = {}
+        self._names = []
+        self._loaded_at = None
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        rows = (
+            db.session.query(Skill.name, UserSkill.user_id)
+            .join(UserSkill, UserSkill.skill_id == Skill.id)
+            .join(User, User.id == UserSkill.user_id)
+            .filter(User.role == 'worker', User.is_approved == True)
+            .all()
+        )
+        postings, stems = {}, {}
+        for name, user_id in rows:
+            postings.setdefault(name, set()).add(user_id)
+            stems.setdefault(_stemmed(name.split()), set()).add(user_id)
+        with self._lock:
+            self._postings = postings
+            self._stems = stems
+            self._names = sorted(postings)
+            self._loaded_at = time.monotonic()
+
+    def add_user(self, user_id, names):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            for name in names:
+                if name not in self._postings:
+                    bisect.insort(self._names, name)
+                self._postings.setdefault(name, set()).add(user_id)
+                self._stems.setdefault(_stemmed(name.split()), set()).add(user_id)
+
+    def remove_user(self, user_id):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            for ids in self._postings.values():
+                ids.discard(user_id)
+            for ids in self._stems.values():
+                ids.discard(user_id)
+
+    def workers_for(self, term):
+        """
+        Worker ids having a skill equal to, or starting with, `term`.
+        """
+        self._ensure_loaded()
+        term = " ".join(_words(term))
+        if not term:
+            return set()
+        ids = set()
+        with self._lock:
+            i = bisect.bisect_left(self._names, term)
+            while i < len(self._names) and self._names[i].startswith(term):
+                ids |= self._postings[self._names[i]]
+                i += 1
+        return ids
+
+    def match_text(self, text):
+        """
+        Worker ids having any skill that appears as a phrase in `text`,
+        e.g. a job's title and description. Words are compared stemmed, so
+        "electrical" matches a worker tagged "electrician".
+        """
+        self._ensure_loaded()
+        words = _words(text)
+        ids = set()
+        with self._lock:
+            for n in range(1, MAX_SKILL_WORDS + 1):
+                for i in range(len(words) - n + 1):
+                    phrase = _stemmed(words[i:i + n])
+                    ids |= self._stems.get(phrase, set())
+                    if phrase.endswith("s"):
+                        ids |= self._stems.get(phrase[:-1], set())
+        return ids
+
+
+skill_index = SkillIndex()
+
+
+def workers_page(term, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    One page of approved workers tagged with `term`, served from the index.
+    Returns a Page, or None when no tag matches so callers can fall back to
+    full-text search.
+    """
+    ids = skill_index.workers_for(term)
+    if not ids:
+        return None
+    page_ids, next_cursor = ids_page(ids, cursor, limit)
+    workers = (
+        User.query.filter(User.id.in_(page_ids), User.is_approved == True)
+        .order_by(User.id)
+        .all()
+    )
+    return Page(workers, next_cursor)
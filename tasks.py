@@ -0,0 +1,221 @@
+import json
+import logging
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from models import db, Task
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_SECONDS = 2
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_POLL_SECONDS = 2.0
+
+
+class TaskQueue:
+    """
+    A transactional outbox in the task table, drained by worker threads.
+
+    enqueue() only adds a Task row to the current session, so it commits or
+    rolls back together with the request's own writes: a hire can't be
+    saved without its notification or the other way round, and the request
+    pays for one INSERT instead of the side effect itself. After the commit
+    a worker thread of this process is woken to run it; `flask run-tasks`
+    runs the same loop as a separate process.
+
+    Tasks run at least once: a failure is retried with exponential backoff
+    and a task whose worker died is picked up again after the lease, so
+    handlers must be safe to run twice.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.handlers = {}
+        self.workers = DEFAULT_WORKERS
+        self.eager = False
+        self.max_attempts = DEFAULT_MAX_ATTEMPTS
+        self.retry_seconds = DEFAULT_RETRY_SECONDS
+        self.lease_seconds = DEFAULT_LEASE_SECONDS
+        self.poll_seconds = DEFAULT_POLL_SECONDS
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self._local = threading.local()
+        self._requeue_at = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("TASK_WORKERS", DEFAULT_WORKERS)
+        app.config.setdefault("TASK_EAGER", False)
+        app.config.setdefault("TASK_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+        app.config.setdefault("TASK_RETRY_SECONDS", DEFAULT_RETRY_SECONDS)
+        app.config.setdefault("TASK_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)
+        app.config.setdefault("TASK_POLL_SECONDS", DEFAULT_POLL_SECONDS)
+        self.app = app
+        self.workers = app.config["TASK_WORKERS"]
+        self.eager = app.config["TASK_EAGER"]
+        self.max_attempts = app.config["TASK_MAX_ATTEMPTS"]
+        self.retry_seconds = app.config["TASK_RETRY_SECONDS"]
+        self.lease_seconds = app.config["TASK_LEASE_SECONDS"]
+        self.poll_seconds = app.config["TASK_POLL_SECONDS"]
+
+        # db.session is shared by every app; one listener serves them all
+        if not event.contains(db.session, "after_commit", self._after_commit):
+            event.listen(db.session, "after_commit", self._after_commit)
+        app.before_request(self._ensure_workers)
+        app.after_request(self._after_request)
+        app.extensions["task_queue"] = self
+
+    def task(self, name):
+        """Decorator registering a handler; the payload is passed as kwargs."""
+        def register(fn):
+            self.handlers[name] = fn
+            return fn
+        return register
+
+    def enqueue(self, name, delay=0, **payload):
+        """Add a task to the current transaction; it runs once that commits."""
+        if name not in self.handlers:
+            raise ValueError(f"unknown task {name!r}")
+        task = Task(name=name, payload=json.dumps(payload),
+                    run_at=datetime.utcnow() + timedelta(seconds=delay))
+        db.session.add(task)
+        db.session.info["tasks_enqueued"] = True
+        return task
+
+    # ----------- RUNNING -----------
+
+    def _claim(self):
+        """Mark the next due task running; None when nothing is due."""
+        while True:
+            now = datetime.utcnow()
+            task_id = (
+                db.session.query(Task.id)
+                .filter(Task.status == "pending", Task.run_at <= now)
+                .order_by(Task.run_at)
+                .limit(1)
+                .scalar()
+            )
+            if task_id is None:
+                db.session.commit()
+                return None
+            # conditional UPDATE: of several workers racing, exactly one wins
+            claimed = Task.query.filter(Task.id == task_id, Task.status == "pending").update(
+                {Task.status: "running", Task.locked_at: now, Task.attempts: Task.attempts + 1},
+                synchronize_session=False,
+            )
+            db.session.commit()
+            if claimed:
+                return db.session.get(Task, task_id)
+
+    def _execute(self, task):
+        task_id, name = task.id, task.name
+        handler = self.handlers.get(name)
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for task {name!r}")
+            handler(**json.loads(task.payload))
+            task.status = "done"
+            task.finished_at = datetime.utcnow()
+            task.last_error = None
+            db.session.commit()
+            return True
+        except Exception:
+            db.session.rollback()
+            task = db.session.get(Task, task_id)
+            task.last_error = traceback.format_exc(limit=8)
+            if handler is None or task.attempts >= self.max_attempts:
+                task.status = "failed"
+                task.finished_at = datetime.utcnow()
+                log.error("task %s #%d failed for good after %d attempts", name, task_id, task.attempts)
+            else:
+                task.status = "pending"
+                task.locked_at = None
+                task.run_at = datetime.utcnow() + timedelta(seconds=self.retry_seconds * 2 ** (task.attempts - 1))
+                log.warning("task %s #%d failed (attempt %d), retrying", name, task_id, task.attempts)
+            db.session.commit()
+            return False
+
+    def requeue_stale(self):
+        """Return tasks whose worker died mid-run to the queue."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        count = Task.query.filter(Task.status == "running", Task.locked_at < cutoff).update(
+            {Task.status: "pending", Task.locked_at: None}, synchronize_session=False
+        )
+        db.session.commit()
+        return count
+
+    def _requeue_if_due(self):
+        # a lease only goes stale lease_seconds after its claim, so checking
+        # twice per lease is enough, not one UPDATE per poll per thread
+        now = time.monotonic()
+        with self._lock:
+            if now < self._requeue_at:
+                return 0
+            self._requeue_at = now + self.lease_seconds / 2
+        return self.requeue_stale()
+
+    def run_pending(self, limit=None):
+        """Run due tasks in this thread until none are left; returns how many ran."""
+        self._requeue_if_due()
+        ran = 0
+        while limit is None or ran < limit:
+            task = self._claim()
+            if task is None:
+                break
+            self._execute(task)
+            ran += 1
+        return ran
+
+    def run_forever(self):
+        """Worker loop: drain, then sleep until woken or the poll interval passes."""
+        while True:
+            try:
+                with self.app.app_context():
+                    ran = self.run_pending()
+            except Exception:
+                log.exception("task worker loop failed")
+                ran = 0
+            if not ran:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _ensure_workers(self):
+        if self.eager or self.workers <= 0:
+            return
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self.run_forever, name=f"tasks-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _after_commit(self, session):
+        if not session.info.pop("tasks_enqueued", False):
+            return
+        if self.eager:
+            self._local.pending = True
+        else:
+            self._wake.set()
+
+    def _after_request(self, response):
+        # eager mode (tests, benchmarks of the request path alone): run the
+        # request's tasks before answering instead of on a worker thread
+        if self.eager and getattr(self._local, "pending", False):
+            self._local.pending = False
+            self.run_pending()
+        return response
+
+    def status(self):
+        """{status: count} over the task table."""
+        return dict(db.session.query(Task.status, db.func.count(Task.id)).group_by(Task.status))
+
+
+tasks = TaskQueue()
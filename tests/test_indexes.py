@@ -0,0 +1,30 @@
+"""
+The hot route queries must search an index on a freshly migrated database;
+`flask check-indexes` runs the same check against a real one.
+"""
+import pytest
+
+from app import create_app
+from migrations import check_query_plans, explain, hot_queries, init_db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "TASK_WORKERS": 0,
+        "RETENTION_ENABLED": False,
+    })
+    with app.app_context():
+        init_db()
+        yield app
+
+
+def test_hot_queries_use_an_index(app):
+    assert check_query_plans() == {}
+
+
+@pytest.mark.parametrize("name", ["open jobs newest", "messages sent between"])
+def test_ordered_by_the_index(app, name):
+    plan = explain(hot_queries()[name])
+    assert not any("TEMP B-TREE" in line for line in plan), plan
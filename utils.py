@@ -1,30 +1,241 @@
-from models import Notification, db, Rating, User
+from datetime import datetime
+from sqlalchemy import and_, case, func, update
+from sqlalchemy.exc import IntegrityError
+from models import Application, Conversation, Job, Message, Notification, db, Rating, User
+from counters import unread
+from fanout import fanout
+from cache import response_cache, WORKER_LISTINGS
+from tasks import tasks
+import rollups
 
-def create_notification(user_id, message):
+def create_notifications(user_ids, message, commit=True):
     """
-    Create and save a notification for a user.
+    One notification per user: one multi-row INSERT per chunk instead of
+    one commit per user. Pass commit=False to keep the rows in the caller's
+    transaction.
     """
-    note = Notification(user_id=user_id, message=message)
-    db.session.add(note)
-    db.session.commit()
-    return note
+    return fanout.write(user_ids, message, commit=commit)
+
+def queue_notifications(user_ids, message):
+    """
+    Like create_notifications(commit=False), but only a task row is written
+    in the caller's transaction; the notifications follow once it commits.
+    """
+    return fanout.dispatch(user_ids, message)
+
+APPROVED_MESSAGE = "Your account has been approved. Welcome aboard!"
+REJECTED_MESSAGE = "Your account could not be approved. Please check your details and contact support."
+
+def moderate_users(user_ids, approve):
+    """
+    Approve or reject the given users that are still awaiting review, with
+    one UPDATE, and queue one notification task for all of them. Returns
+    [(id, role)] of the users that changed. Does not commit.
+    """
+    if not user_ids:
+        return []
+    changed = db.session.execute(
+        update(User)
+        .where(User.id.in_(user_ids), User.reviewed_at.is_(None), User.role != "admin")
+        .values(is_approved=approve, reviewed_at=datetime.utcnow(), worker_changed_at=datetime.utcnow())
+        .returning(User.id, User.role)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if changed:
+        queue_notifications([user_id for user_id, _ in changed],
+                            APPROVED_MESSAGE if approve else REJECTED_MESSAGE)
+    return changed
 
 def mark_notification_read(notification):
-    notification.is_read = True
+    if not notification.is_read:
+        notification.is_read = True
+        db.session.commit()
+        unread.decr("notifications", notification.user_id)
+
+def mark_all_notifications_read(user_id):
+    """
+    Mark every unread notification of a user read with one UPDATE.
+    Returns how many rows changed.
+    """
+    changed = Notification.query.filter(
+        Notification.user_id == user_id, Notification.is_read == db.false()
+    ).update({Notification.is_read: True}, synchronize_session=False)
+    db.session.commit()
+    unread.reset("notifications", user_id)
+    return changed
+
+def record_rating(recipient_id, author_id, job_id, score, comment=None):
+    """
+    Insert a rating, or update the author's existing one for the same job,
+    and queue the recipient's ratings_sum / ratings_count recomputation.
+    Counts it in the daily rollups. Does not commit.
+    """
+    existing = Rating.query.filter_by(recipient_id=recipient_id, author_id=author_id, job_id=job_id).first()
+    replaced = (existing.created_at.date(), existing.score) if existing and existing.created_at else None
+    rollups.rating_recorded(recipient_id, score, replaced=replaced)
+    if existing:
+        existing.score = score
+        existing.comment = comment
+        existing.created_at = datetime.utcnow()
+        rating = existing
+    else:
+        rating = Rating(recipient_id=recipient_id, author_id=author_id, job_id=job_id, score=score, comment=comment)
+        db.session.add(rating)
+
+    tasks.enqueue("ratings.recompute", user_id=recipient_id)
+    return rating
+
+def recompute_user_rating(user_id):
+    """
+    Set one user's ratings_sum / ratings_count from the Rating table. Reads
+    the totals and writes them in one UPDATE, so it is safe to repeat and
+    concurrent runs can't lose a rating. Commits.
+    """
+    User.query.filter_by(id=user_id).update({
+        User.ratings_sum: db.session.query(func.coalesce(func.sum(Rating.score), 0))
+            .filter(Rating.recipient_id == user_id).scalar_subquery(),
+        User.ratings_count: db.session.query(func.count(Rating.id))
+            .filter(Rating.recipient_id == user_id).scalar_subquery(),
+    }, synchronize_session=False)
+    db.session.commit()
+    response_cache.bump(WORKER_LISTINGS)
+
+@tasks.task("ratings.recompute")
+def recompute_rating_task(user_id):
+    recompute_user_rating(user_id)
+
+def recompute_rating_aggregates():
+    """
+    Rebuild ratings_sum / ratings_count for every user from the Rating table.
+    """
+    totals = (
+        db.session.query(Rating.recipient_id, func.sum(Rating.score), func.count(Rating.id))
+        .group_by(Rating.recipient_id)
+        .all()
+    )
+    db.session.execute(update(User).values(ratings_sum=0, ratings_count=0))
+    if totals:
+        db.session.execute(update(User), [
+            {"id": uid, "ratings_sum": total, "ratings_count": count}
+            for uid, total, count in totals
+        ])
     db.session.commit()
+    return len(totals)
+
+def get_conversation(user_a, user_b, create=False):
+    """
+    The Conversation between two users, optionally creating it. A
+    concurrent create loses on the unique pair and re-reads the winner.
+    """
+    low, high = Conversation.pair(user_a, user_b)
+    conv = Conversation.query.filter_by(user_low_id=low, user_high_id=high).first()
+    if conv or not create:
+        return conv
+    try:
+        with db.session.begin_nested():
+            conv = Conversation(user_low_id=low, user_high_id=high)
+            db.session.add(conv)
+    except IntegrityError:
+        conv = Conversation.query.filter_by(user_low_id=low, user_high_id=high).one()
+    return conv
+
+def record_message(sender_id, receiver_id, content):
+    """
+    Insert a message and move its conversation's last message, activity
+    time and the receiver's unread count along with it. Does not commit.
+    """
+    conv = get_conversation(sender_id, receiver_id, create=True)
+    msg = Message(conversation_id=conv.id, sender_id=sender_id, receiver_id=receiver_id,
+                  content=content, timestamp=datetime.utcnow())
+    db.session.add(msg)
+    db.session.flush()
+
+    unread_col = Conversation.unread_low if receiver_id == conv.user_low_id else Conversation.unread_high
+    Conversation.query.filter_by(id=conv.id).update({
+        Conversation.last_message_id: msg.id,
+        Conversation.last_activity: msg.timestamp,
+        unread_col: unread_col + 1,
+    })
+    return msg
+
+def thread_query(user_a, user_b):
+    """All messages exchanged between two users, via their conversation."""
+    low, high = Conversation.pair(user_a, user_b)
+    return Message.query.join(Conversation, Conversation.id == Message.conversation_id).filter(
+        Conversation.user_low_id == low, Conversation.user_high_id == high
+    )
 
-def add_rating(worker_id, client_id, job_id, score, comment=None):
+def mark_thread_read(reader_id, other_id):
     """
-    Create a rating record and return it.
-    Also returns the worker's new average (consumer code can fetch).
+    Mark everything other_id sent to reader_id read with one UPDATE.
+    Returns how many messages changed.
     """
-    r = Rating(worker_id=worker_id, client_id=client_id, job_id=job_id, score=int(score), comment=comment)
-    db.session.add(r)
+    seen = Message.query.filter(
+        Message.sender_id == other_id, Message.receiver_id == reader_id, Message.is_read == db.false()
+    ).update({Message.is_read: True}, synchronize_session=False)
+    if seen:
+        low, high = Conversation.pair(reader_id, other_id)
+        unread_col = Conversation.unread_low if reader_id == low else Conversation.unread_high
+        Conversation.query.filter_by(user_low_id=low, user_high_id=high) \
+            .update({unread_col: 0}, synchronize_session=False)
+        db.session.commit()
+        unread.decr("messages", reader_id, seen)
+    return seen
+
+def inbox_query(user_id):
+    """
+    The user's conversations, most recent first, each with the partner
+    User and last Message loaded in the same statement.
+    """
+    partner_id = case((Conversation.user_low_id == user_id, Conversation.user_high_id),
+                      else_=Conversation.user_low_id)
+    return (
+        db.session.query(Conversation, User)
+        .join(User, User.id == partner_id)
+        .options(db.joinedload(Conversation.last_message))
+        .filter((Conversation.user_low_id == user_id) | (Conversation.user_high_id == user_id))
+        .order_by(Conversation.last_activity.desc(), Conversation.id.desc())
+    )
+
+def backfill_conversations():
+    """
+    Build Conversation rows from existing messages and point every
+    message at its conversation.
+    """
+    low = case((Message.sender_id < Message.receiver_id, Message.sender_id), else_=Message.receiver_id)
+    high = case((Message.sender_id < Message.receiver_id, Message.receiver_id), else_=Message.sender_id)
+    unread_by_low = func.sum(case((and_(Message.receiver_id == low, Message.is_read == db.false()), 1), else_=0))
+    unread_by_high = func.sum(case((and_(Message.receiver_id == high, Message.is_read == db.false()), 1), else_=0))
+
+    pairs = (
+        db.session.query(low, high, func.max(Message.id), unread_by_low, unread_by_high)
+        .filter(Message.conversation_id.is_(None))
+        .group_by(low, high)
+        .all()
+    )
+    if not pairs:
+        return 0
+
+    last_ids = [row[2] for row in pairs]
+    stamps = dict(db.session.query(Message.id, Message.timestamp).filter(Message.id.in_(last_ids)))
+    db.session.add_all(
+        Conversation(user_low_id=lo, user_high_id=hi, last_message_id=last_id,
+                     last_activity=stamps.get(last_id), unread_low=u_lo or 0, unread_high=u_hi or 0)
+        for lo, hi, last_id, u_lo, u_hi in pairs
+    )
+    db.session.flush()
+
+    conv_id = (
+        db.session.query(Conversation.id)
+        .filter(Conversation.user_low_id == low, Conversation.user_high_id == high)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(Message).where(Message.conversation_id.is_(None)).values(conversation_id=conv_id)
+    )
     db.session.commit()
-    # Optionally: compute avg
-    worker = User.query.get(worker_id)
-    avg = worker.average_rating()
-    return r, avg
+    return len(pairs)
+
 def is_hired(worker_id, client_id):
     application = Application.query.filter_by(worker_id=worker_id).join(Job).filter(Job.client_id==client_id, Application.status=='hired').first()
     return application is not None
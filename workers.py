@@ -0,0 +1,128 @@
+"""
+Worker pages: dashboard, job search and applying.
+"""
+from flask import Blueprint, jsonify, redirect, render_template, request
+from flask_login import current_user, login_required
+from sqlalchemy.orm import joinedload
+
+import geo
+import rollups
+from models import db, Application, Job, User
+from pagination import keyset_page, offset_page, page_args, page_json, wants_json
+from recommend import recommended_jobs
+from search import search_jobs
+from serializers import job_json
+from utils import queue_notifications
+
+workers = Blueprint("workers", __name__)
+
+
+@workers.route('/worker/dashboard')
+@login_required
+def dashboard():
+    if current_user.role != 'worker':
+        return redirect('/')
+
+    hired_clients = (
+        db.session.query(User, Job)
+        .join(Job, Job.client_id == User.id)
+        .join(Application, Application.job_id == Job.id)
+        .filter(Application.worker_id == current_user.id, Application.status == "hired")
+        .all()
+    )
+
+    return render_template(
+        'worker_dashboard.html',
+        hired_clients=hired_clients,
+        recommended_jobs=recommended_jobs(current_user.id)
+    )
+
+
+@workers.route('/find_jobs')
+@login_required
+def find_jobs():
+    if current_user.role != 'worker':
+        return redirect('/')
+
+    search = request.args.get('search', "").strip()
+    location = request.args.get('location', "").strip()
+    radius = geo.radius_arg(request.args)
+    cursor, limit = page_args()
+
+    # ✅ Ranked full-text search over title/description; a known city becomes
+    # a radius search (nearest first), any other location is matched as text.
+    # Newest first (seeking on id) when there is nothing to rank.
+    place = geo.geocode(location) if location else None
+    if place:
+        jobs_query = search_jobs(search, near=(place[1:], radius))
+    else:
+        jobs_query = search_jobs(search, location)
+    jobs_query = jobs_query.options(joinedload(Job.client))
+    if search or location:
+        page = offset_page(jobs_query, cursor, limit)
+    else:
+        page = keyset_page(jobs_query, Job.id, cursor, limit)
+
+    if wants_json():
+        return jsonify(page_json(page, job_json))
+
+    # ✅ Get job IDs the current worker already applied to, for this page only
+    page_job_ids = [job.id for job in page.items]
+    applied_job_ids = [
+        job_id for (job_id,) in db.session.query(Application.job_id).filter(
+            Application.worker_id == current_user.id, Application.job_id.in_(page_job_ids)
+        )
+    ] if page_job_ids else []
+
+    distances = {
+        job.id: geo.distance_km(place[1], place[2], job.lat, job.lon) for job in page.items
+    } if place else {}
+
+    return render_template("find_jobs.html",
+                           jobs=page.items,
+                           search=search,
+                           location=location,
+                           radius=radius,
+                           place=place,
+                           distances=distances,
+                           next_cursor=page.next_cursor,
+                           applied_job_ids=applied_job_ids)
+
+
+# ----------- APPLY (AJAX-aware) -----------
+@workers.route('/apply/<int:job_id>', methods=['POST'])
+@login_required
+def apply_job(job_id):
+    if current_user.role != 'worker':
+        return "FORBIDDEN", 403
+
+    job = Job.query.get_or_404(job_id)
+
+    # ✅ Check if already applied
+    existing = Application.query.filter_by(
+        job_id=job_id,
+        worker_id=current_user.id
+    ).first()
+
+    if existing:
+        return "ALREADY"
+
+    # ✅ Create application
+    application = Application(
+        job_id=job_id,
+        worker_id=current_user.id,
+        client_id=job.client_id,  # client_id correctly assigned
+        status="applied"
+    )
+    db.session.add(application)
+    rollups.incr(rollups.APPLICATIONS)
+
+    # ✅ Notify client (queued in the same commit as the application)
+    queue_notifications(
+        [job.client_id],
+        f"{current_user.name} applied for your job: {job.title}"
+    )
+
+    db.session.commit()
+
+    return "OK"